@@ -3,6 +3,12 @@ ASGI config for projetweb project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Servi par ASGI, le projet branche les variantes asynchrones des pages en
+lecture seule (restaurant/views_async.py) :
+
+    uvicorn projetweb.asgi:application --workers 4
+    gunicorn projetweb.asgi:application -k uvicorn.workers.UvicornWorker -w 4
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -12,5 +18,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'projetweb.settings')
+os.environ.setdefault('SERVEUR_ASGI', '1')
 
 application = get_asgi_application()
@@ -33,4 +33,54 @@ from .models import EmployeInfo
 class EmployeInfoAdmin(admin.ModelAdmin):
     list_display = ['profile', 'poste', 'type_contrat', 'date_embauche', 'salaire_horaire', 'actif']
     list_filter = ['poste', 'type_contrat', 'actif']
-    search_fields = ['profile__user__username', 'profile__user__email']
\ No newline at end of file
+    search_fields = ['profile__user__username', 'profile__user__email']
+
+
+
+from .models import PointsLedger
+
+@admin.register(PointsLedger)
+class PointsLedgerAdmin(admin.ModelAdmin):
+    list_display = ['user', 'points', 'motif', 'commande', 'date_creation']
+    list_filter = ['motif']
+    search_fields = ['user__username']
+
+    # Journal en ajout seul : les mouvements passent par PointsLedger.enregistrer()
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+
+from .models import Avis
+
+@admin.register(Avis)
+class AvisAdmin(admin.ModelAdmin):
+    list_display = ['user', 'note', 'date_creation', 'suspect']
+    list_filter = ['suspect', 'note']
+    search_fields = ['user__username', 'commentaire']
+
+
+
+from django.utils import timezone
+
+from .models import Tache
+
+@admin.register(Tache)
+class TacheAdmin(admin.ModelAdmin):
+    list_display = ['id', 'nom', 'statut', 'tentatives', 'executer_apres', 'date_creation', 'date_fin']
+    list_filter = ['statut', 'nom']
+    readonly_fields = ['jeton', 'reservee_jusqu_a', 'derniere_erreur', 'date_creation', 'date_fin']
+    actions = ['relancer']
+
+    @admin.action(description="Relancer les tâches sélectionnées")
+    def relancer(self, request, queryset):
+        relancees = queryset.exclude(statut=Tache.EN_COURS).update(
+            statut=Tache.A_FAIRE, tentatives=0, executer_apres=timezone.now(),
+        )
+        self.message_user(request, f"{relancees} tâche(s) relancée(s).")
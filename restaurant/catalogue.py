@@ -0,0 +1,116 @@
+# restaurant/catalogue.py
+"""
+Instantané du menu (plats groupés par type de catégorie) mis en cache.
+
+L'instantané est rangé sous une clé qui contient un numéro de version,
+calculé en base : nombre de plats et dernières dates de modification des
+plats et de leurs catégories. Toute écriture, quel que soit le processus qui
+la fait, change donc la version ; l'ancien instantané n'est plus jamais relu
+et expire de lui-même.
+
+Pour ne pas payer cette requête à chaque page, la version est gardée
+VERIFICATION secondes dans le cache. Les signaux de Plat et Categorie
+l'effacent (voir signals.py) : avec un cache partagé (CACHE_URL, voir
+settings.py), tous les processus voient la modification aussitôt ; avec un
+cache propre à chaque processus, les autres la voient au plus VERIFICATION
+secondes plus tard.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+
+from .models import Categorie, Plat
+from .routers import ALIAS_PRINCIPAL
+
+CLE_VERSION = 'menu:version'
+DUREE_CACHE = 24 * 60 * 60  # secondes
+VERIFICATION = 5  # secondes entre deux relectures de la version en base
+
+
+# Lus sur la base principale, comme l'instantané que la version désigne
+_ETAT = {
+    'nombre': Count('id'),
+    'plats': Max('date_modification'),
+    'categories': Max('categorie__date_modification'),
+}
+
+
+def _version(etat):
+    return hashlib.md5(repr(sorted(etat.items())).encode()).hexdigest()
+
+
+def version_menu():
+    """Numéro de version courant du menu."""
+    version = cache.get(CLE_VERSION)
+    if version is None:
+        version = _version(Plat.objects.using(ALIAS_PRINCIPAL).aggregate(**_ETAT))
+        cache.set(CLE_VERSION, version, VERIFICATION)
+    return version
+
+
+async def aversion_menu():
+    """version_menu() pour le code asynchrone (cache.aget, aaggregate)."""
+    version = await cache.aget(CLE_VERSION)
+    if version is None:
+        version = _version(await Plat.objects.using(ALIAS_PRINCIPAL).aaggregate(**_ETAT))
+        await cache.aset(CLE_VERSION, version, VERIFICATION)
+    return version
+
+
+def oublier_version():
+    """Fait relire la version en base au prochain accès."""
+    cache.delete(CLE_VERSION)
+
+
+def invalider_menu():
+    """Fait relire la version du menu une fois la transaction validée."""
+    transaction.on_commit(oublier_version)
+
+
+def _construire():
+    plats = {}
+    par_type = {type_: [] for type_, _ in Categorie.TYPES}
+    # Lu sur la base principale : un instantané construit depuis une réplique
+    # en retard resterait en cache sous la nouvelle version
+    requete = Plat.objects.using(ALIAS_PRINCIPAL).select_related('categorie').order_by('categorie__type', 'pk')
+    for plat in requete:
+        plats[plat.pk] = {
+            'id': plat.pk,
+            'nom': plat.nom,
+            'description': plat.description,
+            'prix': plat.prix,
+            'disponible': plat.disponible,
+            'image': plat.image.name if plat.image else '',
+            'image_empreinte': plat.image_empreinte,
+            'image_largeur': plat.image_largeur,
+            'categorie': plat.categorie.nom,
+            'type': plat.categorie.type,
+        }
+        par_type.setdefault(plat.categorie.type, []).append(plat.pk)
+    return {'plats': plats, 'par_type': par_type}
+
+
+def instantane():
+    """
+    Instantané complet du menu :
+    {'version': n, 'plats': {id: {...}}, 'par_type': {type: [id, ...]}}
+    """
+    version = version_menu()
+    cle = f'menu:{version}'
+    donnees = cache.get(cle)
+    if donnees is None:
+        donnees = _construire()
+        donnees['version'] = version
+        cache.set(cle, donnees, DUREE_CACHE)
+    return donnees
+
+
+def plats_disponibles():
+    """{type de catégorie: [plat, ...]} limité aux plats disponibles."""
+    donnees = instantane()
+    return {
+        type_: [donnees['plats'][pk] for pk in ids if donnees['plats'][pk]['disponible']]
+        for type_, ids in donnees['par_type'].items()
+    }
@@ -0,0 +1,81 @@
+# restaurant/cuisine.py
+"""
+Flux des commandes pour l'écran cuisine.
+
+Le client garde un curseur (date_modification, id) et ne reçoit que les
+commandes créées ou modifiées après lui. Les lignes trop récentes (moins de
+MARGE) ne sont pas encore servies : une transaction horodatée avant le
+curseur mais validée après ne peut donc pas être sautée.
+"""
+from datetime import timedelta
+
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from .models import STATUTS_A_SERVIR, Commande
+from .pagination import encoder_curseur, decoder_curseur, apres
+
+MARGE = timedelta(seconds=1)
+LIMITE = 100
+
+# Même condition que l'index partiel commande_statut_date_idx, valeurs écrites
+# en clair : passées en paramètres (statut__in), SQLite ne peut pas vérifier
+# que la requête est couverte par l'index et parcourt toute la table.
+FILTRE_A_SERVIR = RawSQL(
+    '"restaurant_commande"."statut" IN (%s)' % ', '.join(f"'{statut}'" for statut in STATUTS_A_SERVIR),
+    (), output_field=BooleanField(),
+)
+
+
+def borne():
+    """Date au-delà de laquelle les modifications ne sont pas encore servies."""
+    return timezone.now() - MARGE
+
+
+def a_servir():
+    """Commandes en attente ou en préparation, avec leurs lignes."""
+    return (
+        Commande.objects.filter(FILTRE_A_SERVIR)
+        .select_related('user')
+        .prefetch_related('lignes__plat')
+        .order_by('-date_creation')
+    )
+
+
+def dernier_curseur(limite):
+    """Requête du curseur de la dernière commande modifiée avant `limite`."""
+    return (
+        Commande.objects.filter(date_modification__lte=limite)
+        .order_by('-date_modification', '-pk')
+        .values_list('date_modification', 'pk')
+    )
+
+
+def changements(curseur, limite):
+    """Commandes créées ou modifiées après `curseur` et au plus tard à `limite`."""
+    return (
+        Commande.objects.filter(date_modification__lte=limite)
+        .filter(apres('date_modification', curseur))
+        .select_related('user')
+        .prefetch_related('lignes__plat')
+        .order_by('date_modification', 'pk')[:LIMITE]
+    )
+
+
+def serialiser(commande):
+    return {
+        'id': commande.pk,
+        'statut': commande.statut,
+        'statut_libelle': commande.get_statut_display(),
+        'a_servir': commande.statut in STATUTS_A_SERVIR,
+        'date_creation': timezone.localtime(commande.date_creation).strftime('%d/%m/%Y à %H:%M'),
+        'client': commande.user.get_full_name() or commande.user.username,
+        'montant_total': str(commande.montant_total),
+        'mode_paiement': commande.get_mode_paiement_display(),
+        'adresse_livraison': commande.adresse_livraison or '',
+        'lignes': [
+            {'quantite': ligne.quantite, 'plat': ligne.plat.nom, 'sous_total': str(ligne.sous_total)}
+            for ligne in commande.lignes.all()
+        ],
+    }
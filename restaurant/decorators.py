@@ -4,21 +4,36 @@ from django.shortcuts import redirect
 from django.contrib import messages
 from functools import wraps
 
+from asgiref.sync import iscoroutinefunction
+
+def _refuser_non_client(request):
+    """Redirection pour qui n'est pas client, None pour un client"""
+    if not request.user.is_authenticated:
+        messages.error(request, "Vous devez être connecté pour accéder à cette page.")
+        return redirect('login')
+    
+    # request.role est résolu une fois par ProfileMiddleware
+    if request.role != 'client':
+        messages.error(request, "Cette page est réservée aux clients.")
+        return redirect('employe' if request.role == 'employe' else 'accueil')
+    return None
+
+
 def client_required(function):
     """
     Décorateur pour restreindre l'accès aux clients uniquement
+    (vues synchrones ou asynchrones)
     """
+    if iscoroutinefunction(function):
+        @wraps(function)
+        async def awrap(request, *args, **kwargs):
+            return _refuser_non_client(request) or await function(request, *args, **kwargs)
+        
+        return awrap
+    
     @wraps(function)
     def wrap(request, *args, **kwargs):
-        if not request.user.is_authenticated:
-            messages.error(request, "Vous devez être connecté pour accéder à cette page.")
-            return redirect('login')
-        
-        if hasattr(request.user, 'profile') and request.user.profile.role == 'client':
-            return function(request, *args, **kwargs)
-        else:
-            messages.error(request, "Cette page est réservée aux clients.")
-            return redirect('employe' if request.user.profile.role == 'employe' else 'accueil')
+        return _refuser_non_client(request) or function(request, *args, **kwargs)
     
     return wrap
 
@@ -33,11 +48,11 @@ def employe_required(function):
             messages.error(request, "Vous devez être connecté pour accéder à cette page.")
             return redirect('login')
         
-        if hasattr(request.user, 'profile') and request.user.profile.role == 'employe':
+        if request.role == 'employe':
             return function(request, *args, **kwargs)
         else:
             messages.error(request, "Cette page est réservée aux employés.")
-            return redirect('client' if request.user.profile.role == 'client' else 'accueil')
+            return redirect('client' if request.role == 'client' else 'accueil')
     
     return wrap
 
@@ -54,13 +69,29 @@ def role_required(allowed_roles):
                 messages.error(request, "Vous devez être connecté pour accéder à cette page.")
                 return redirect('login')
             
-            user_role = request.user.profile.role if hasattr(request.user, 'profile') else None
-            
-            if user_role in allowed_roles:
+            if request.role in allowed_roles:
                 return function(request, *args, **kwargs)
             else:
                 messages.error(request, "Vous n'avez pas l'autorisation d'accéder à cette page.")
                 return redirect('accueil')
         
         return wrap
-    return decorator
\ No newline at end of file
+    return decorator
+
+def staff_required(function):
+    """
+    Décorateur pour restreindre l'accès aux membres du staff (is_staff)
+    """
+    @wraps(function)
+    def wrap(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            messages.error(request, "Vous devez être connecté pour accéder à cette page.")
+            return redirect('login')
+        
+        if request.user.is_staff:
+            return function(request, *args, **kwargs)
+        else:
+            messages.error(request, "Cette page est réservée à l'administration.")
+            return redirect('accueil')
+    
+    return wrap
@@ -0,0 +1,112 @@
+# restaurant/exports.py
+"""
+Export CSV de l'historique des commandes, ligne de commande par ligne.
+
+Les commandes sont lues par paquets (iterator(chunk_size=...)), leurs lignes
+préchargées paquet par paquet : la mémoire utilisée ne dépend pas de la
+période exportée. Partagé par la vue export_commandes et la commande
+exporter_commandes.
+
+Sous ASGI, Django lit entièrement un itérateur synchrone avant d'envoyer la
+réponse : la vue passe alors par aflux_csv(), qui produit le même texte
+paquet par paquet sans bloquer la boucle d'événements.
+"""
+import csv
+from datetime import date, datetime, time, timedelta
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+from django.utils import timezone
+
+from .models import Commande
+
+TAILLE_PAQUET = 500
+
+COLONNES = [
+    'commande', 'date', 'client', 'statut', 'mode_paiement', 'montant_total',
+    'points_gagnes', 'plat', 'quantite', 'prix_unitaire', 'sous_total',
+]
+
+
+class Echo:
+    """Pseudo-fichier : write() renvoie la ligne au lieu de la garder."""
+
+    def write(self, valeur):
+        return valeur
+
+
+def lire_filtres(debut=None, fin=None, statuts=None):
+    """
+    Convertit les filtres reçus en texte ('AAAA-MM-JJ', statuts séparés par
+    des virgules ou liste). Lève ValueError avec un message lisible.
+    """
+    try:
+        debut = date.fromisoformat(debut) if debut else None
+        fin = date.fromisoformat(fin) if fin else None
+    except ValueError:
+        raise ValueError("Les dates doivent être au format AAAA-MM-JJ.")
+    if debut and fin and debut > fin:
+        raise ValueError("La date de début doit précéder la date de fin.")
+
+    if isinstance(statuts, str):
+        statuts = statuts.split(',')
+    statuts = [statut.strip() for statut in statuts or [] if statut.strip()]
+    inconnus = set(statuts) - set(dict(Commande.STATUTS))
+    if inconnus:
+        raise ValueError(f"Statut(s) inconnu(s) : {', '.join(sorted(inconnus))}.")
+
+    return debut, fin, statuts
+
+
+def commandes(debut=None, fin=None, statuts=None):
+    """Commandes de `debut` à `fin` inclus (dates locales), des statuts donnés."""
+    requete = Commande.objects.select_related('user').prefetch_related('lignes__plat')
+    # Bornes en datetime pour garder l'index sur date_creation utilisable
+    if debut:
+        requete = requete.filter(date_creation__gte=timezone.make_aware(datetime.combine(debut, time.min)))
+    if fin:
+        requete = requete.filter(
+            date_creation__lt=timezone.make_aware(datetime.combine(fin + timedelta(days=1), time.min))
+        )
+    if statuts:
+        requete = requete.filter(statut__in=statuts)
+    return requete.order_by('date_creation', 'pk')
+
+
+def lignes(requete, taille=TAILLE_PAQUET):
+    """Lignes du CSV (listes de valeurs), en-tête compris."""
+    yield COLONNES
+    for commande in requete.iterator(chunk_size=taille):
+        entete = [
+            commande.pk,
+            timezone.localtime(commande.date_creation).strftime('%Y-%m-%d %H:%M:%S'),
+            commande.user.username,
+            commande.statut,
+            commande.mode_paiement,
+            commande.montant_total,
+            commande.points_gagnes,
+        ]
+        details = list(commande.lignes.all())
+        if not details:
+            yield entete + ['', '', '', '']
+        for ligne in details:
+            yield entete + [ligne.plat.nom, ligne.quantite, ligne.prix_unitaire, ligne.sous_total]
+
+
+def flux_csv(requete, taille=TAILLE_PAQUET):
+    """Texte CSV produit ligne par ligne, pour une StreamingHttpResponse."""
+    ecrivain = csv.writer(Echo())
+    for ligne in lignes(requete, taille):
+        yield ecrivain.writerow(ligne)
+
+
+async def aflux_csv(requete, taille=TAILLE_PAQUET):
+    """
+    Variante asynchrone de flux_csv() (ASGI). Le générateur synchrone avance
+    toujours dans le même thread (sync_to_async), celui de sa connexion.
+    """
+    flux = flux_csv(requete, taille)
+    suivantes = sync_to_async(lambda: list(islice(flux, taille)))
+    while paquet := await suivantes():
+        yield ''.join(paquet)
@@ -7,7 +7,7 @@ from datetime import timedelta, datetime, time as datetime_time
 from .models import Reservation, Table
 from .models import Avis
 from .models import Commande
-import re
+from . import moderation
 
 class RegisterForm(UserCreationForm):
     email = forms.EmailField(required=True, label="Adresse email")
@@ -24,26 +24,40 @@ class RegisterForm(UserCreationForm):
         
         if commit:
             user.save()
-            # ✅ Le profil est créé automatiquement par le signal
-            # On recharge l'utilisateur pour avoir le profil
-            user.refresh_from_db()
-            
-            # Mettre à jour le rôle
-            if hasattr(user, 'profile'):
-                user.profile.role = role
-                user.profile.save()
+            # ✅ Le profil est créé par le signal et reste attaché à user :
+            # seul le rôle est écrit, et seulement s'il diffère du défaut
+            user.profile.role = role
+            user.profile.save()
         
         return user
 
 class ReservationForm(forms.ModelForm):
     class Meta:
         model = Reservation
-        fields = ['table', 'date', 'time']
+        fields = ['table', 'date', 'time', 'nb_personnes']
         widgets = {
             'date': forms.DateInput(attrs={'type': 'date', 'id': 'id_date', 'required': True}),
             'time': forms.TimeInput(attrs={'type': 'time', 'id': 'id_time', 'required': True}),
             'table': forms.HiddenInput(attrs={'id': 'id_table'}),
+            'nb_personnes': forms.NumberInput(attrs={'id': 'id_nb_personnes', 'min': 1}),
         }
+        labels = {
+            'nb_personnes': 'Nombre de personnes',
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Sans table choisie, la vue attribue la mieux adaptée (occupation.attribuer_table)
+        self.fields['table'].required = False
+        # Absent des anciens formulaires : valeur par défaut du modèle
+        self.fields['nb_personnes'].required = False
+
+    def clean_nb_personnes(self):
+        nb_personnes = self.cleaned_data['nb_personnes']
+        if nb_personnes is None:
+            # Champ laissé vide : valeur par défaut du modèle, comme s'il était absent
+            return Reservation._meta.get_field('nb_personnes').get_default()
+        return nb_personnes
 
     def clean_date(self):
         date = self.cleaned_data['date']
@@ -69,6 +83,11 @@ class ReservationForm(forms.ModelForm):
         date = cleaned_data.get('date')
         time = cleaned_data.get('time')
 
+        nb_personnes = cleaned_data.get('nb_personnes')
+
+        if table and nb_personnes and nb_personnes > table.seats:
+            raise forms.ValidationError(f"La table {table.number} n'a que {table.seats} places.")
+
         if table and date and time:
             if Reservation.objects.filter(table=table, date=date, time=time).exists():
                 raise forms.ValidationError("Cette table est déjà réservée à cette date et heure.")
@@ -93,34 +112,12 @@ class AvisForm(forms.ModelForm):
         }
 
     def clean_commentaire(self):
-        commentaire = self.cleaned_data.get("commentaire", "").strip().lower()
-
-        # Minimum de longueur
-        if len(commentaire) < 5:
-            raise forms.ValidationError("Votre avis est trop court.")
-
-        # Doit contenir une voyelle
-        if not re.search(r"[aeiouyàâéèêëîïôöûü]", commentaire):
-            raise forms.ValidationError("Votre avis doit contenir des mots compréhensibles.")
-
-        # Pas plus de 3 consonnes d'affilée
-        if re.search(r"[bcdfghjklmnpqrstvwxyz]{4,}", commentaire):
-            raise forms.ValidationError("Votre avis semble contenir des séquences non naturelles.")
-
-        # Si aucun espace et plus de 6 lettres ⇒ mot suspect
-        if " " not in commentaire and len(commentaire) > 6:
-            raise forms.ValidationError("Votre avis doit être une phrase ou plusieurs mots.")
-
-        # Éviter les répétitions absurdes
-        if re.search(r"(.)\1{3,}", commentaire):
-            raise forms.ValidationError("Votre avis ne doit pas contenir de répétitions anormales.")
-
-        # Ratio consonnes/voyelles
-        consonnes = re.findall(r"[bcdfghjklmnpqrstvwxyz]", commentaire)
-        voyelles = re.findall(r"[aeiouyàâéèêëîïôöûü]", commentaire)
+        commentaire = moderation.normaliser(self.cleaned_data.get("commentaire", ""))
 
-        if len(voyelles) == 0 or (len(consonnes) / max(1, len(voyelles))) > 4:
-            raise forms.ValidationError("Votre avis ne semble pas être un texte compréhensible.")
+        # Longueur, voyelles, suites de consonnes, répétitions : un seul parcours
+        verdict = moderation.evaluer(commentaire)
+        if not verdict.accepte:
+            raise forms.ValidationError(verdict.message)
 
         return commentaire
 
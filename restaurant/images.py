@@ -0,0 +1,135 @@
+# restaurant/images.py
+"""
+Versions réduites des photos de plats, en WebP et en JPEG, à quelques
+largeurs fixes (LARGEURS), pour servir à chaque écran la plus petite qui
+convient (attribut srcset, voir templatetags/images.py).
+
+Les versions d'une photo envoyée pour un Plat sont rangées à côté de
+l'original et nommées d'après l'empreinte de son contenu :
+plats/<empreinte>-<largeur>.<extension>. Une même photo envoyée deux fois
+n'est donc traitée qu'une fois. L'empreinte et la largeur de l'original sont
+gardées sur le plat (image_empreinte, image_largeur) pour construire le
+srcset sans interroger le stockage.
+
+Les photos fournies avec l'application (static/restaurant/images) sont
+traitées par la commande generer_derives --statiques, qui tient le
+manifeste MANIFESTE_STATIQUES.
+"""
+import hashlib
+import io
+import json
+import posixpath
+from functools import lru_cache
+
+from django.contrib.staticfiles import finders
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+LARGEURS = (160, 320, 640, 1024)
+FORMATS = {
+    # extension : (format Pillow, options d'enregistrement)
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+DOSSIER_STATIQUES = 'restaurant/images/derives'
+MANIFESTE_STATIQUES = f'{DOSSIER_STATIQUES}/derives.json'
+
+
+def empreinte(fichier):
+    """Empreinte (SHA-256 tronqué) du contenu d'un fichier ouvert."""
+    fichier.seek(0)
+    calcul = hashlib.sha256()
+    for morceau in iter(lambda: fichier.read(64 * 1024), b''):
+        calcul.update(morceau)
+    fichier.seek(0)
+    return calcul.hexdigest()[:16]
+
+
+def largeurs(largeur_originale):
+    """Largeurs produites : jamais plus large que l'original."""
+    retenues = [largeur for largeur in LARGEURS if largeur < largeur_originale]
+    retenues.append(min(largeur_originale, LARGEURS[-1]))
+    return retenues
+
+
+def nom_derive(dossier, base, largeur, extension):
+    return posixpath.join(dossier, f'{base}-{largeur}.{extension}')
+
+
+def _encoder(image, largeur, format_, options):
+    hauteur = max(1, round(image.height * largeur / image.width))
+    reduite = image.resize((largeur, hauteur), Image.Resampling.LANCZOS)
+    if format_ == 'JPEG' and reduite.mode != 'RGB':
+        # Pas de transparence en JPEG : fond blanc
+        fond = Image.new('RGB', reduite.size, 'white')
+        fond.paste(reduite, mask=reduite.getchannel('A') if 'A' in reduite.getbands() else None)
+        reduite = fond
+    tampon = io.BytesIO()
+    reduite.save(tampon, format_, **options)
+    return tampon.getvalue()
+
+
+def generer(fichier, dossier, base, storage):
+    """
+    Écrit dans `storage` les versions réduites de l'image `fichier` qui
+    n'existent pas encore. Renvoie (largeur de l'original, nombre de fichiers écrits).
+    """
+    fichier.seek(0)
+    with Image.open(fichier) as ouverte:
+        # Photos de téléphone : applique l'orientation EXIF
+        image = ImageOps.exif_transpose(ouverte)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or 'A' in image.getbands() else 'RGB')
+        image.load()
+    fichier.seek(0)
+
+    ecrits = 0
+    for largeur in largeurs(image.width):
+        for extension, (format_, options) in FORMATS.items():
+            nom = nom_derive(dossier, base, largeur, extension)
+            if storage.exists(nom):
+                continue
+            storage.save(nom, ContentFile(_encoder(image, largeur, format_, options)))
+            ecrits += 1
+    return image.width, ecrits
+
+
+def deriver_plat(plat):
+    """
+    Produit les versions de plat.image et renseigne image_empreinte et
+    image_largeur (sans enregistrer le plat). À appeler avant l'enregistrement
+    pour une photo qui vient d'être envoyée.
+    """
+    image = plat.image
+    if image._committed:
+        dossier = posixpath.dirname(image.name)
+        image.open('rb')
+    else:
+        dossier = posixpath.dirname(image.field.generate_filename(plat, image.name))
+    try:
+        plat.image_empreinte = empreinte(image)
+        plat.image_largeur, _ = generer(image, dossier, plat.image_empreinte, image.storage)
+    finally:
+        if image._committed:
+            image.close()
+
+
+def sources(dossier, base, largeur_originale, url):
+    """{extension: 'url 160w, url 320w, ...'} pour une image traitée."""
+    return {
+        extension: ', '.join(
+            f'{url(nom_derive(dossier, base, largeur, extension))} {largeur}w'
+            for largeur in largeurs(largeur_originale)
+        )
+        for extension in FORMATS
+    }
+
+
+@lru_cache(maxsize=1)
+def manifeste_statiques():
+    """{nom du fichier : {'base': ..., 'largeur': ...}} des images fournies déjà traitées."""
+    chemin = finders.find(MANIFESTE_STATIQUES)
+    if not chemin:
+        return {}
+    with open(chemin, encoding='utf-8') as fichier:
+        return json.load(fichier)
@@ -0,0 +1,97 @@
+# restaurant/instrumentation.py
+"""
+Mesures d'une requête : nombre et durée des requêtes SQL, temps de rendu des
+templates. Utilisé par InstrumentationMiddleware (voir middleware.py).
+
+Les requêtes SQL sont chronométrées par un execute_wrapper, qui fonctionne
+aussi avec DEBUG = False. Il est posé une fois pour toutes sur chaque
+connexion, et pas seulement sur celles du thread courant : sous ASGI, les
+requêtes d'une vue s'exécutent dans le thread de sync_to_async, qui reçoit
+une copie du contexte et donc la mesure en cours. Le rendu des templates est chronométré en
+enveloppant Template.render : seul le template le plus externe compte, pour
+ne pas additionner deux fois un {% include %}.
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.template.base import Template
+
+_mesure_courante = contextvars.ContextVar('instrumentation', default=None)
+
+
+class Mesure:
+    def __init__(self):
+        self.requetes = 0
+        self.temps_sql = 0.0
+        self.temps_templates = 0.0
+        self.profondeur = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Signature attendue par connection.execute_wrapper()
+        debut = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.temps_sql += time.perf_counter() - debut
+            self.requetes += 1
+
+
+def _executer(execute, sql, params, many, context):
+    mesure = _mesure_courante.get()
+    if mesure is None:
+        return execute(sql, params, many, context)
+    return mesure(execute, sql, params, many, context)
+
+
+def _instrumenter(connexion):
+    # En tête de liste : le pop() d'un connection.execute_wrapper() en cours
+    # retire toujours son propre wrapper
+    if _executer not in connexion.execute_wrappers:
+        connexion.execute_wrappers.insert(0, _executer)
+
+
+@receiver(connection_created)
+def _connexion_ouverte(sender, connection, **kwargs):
+    _instrumenter(connection)
+
+
+def _chronometrer_templates():
+    if getattr(Template.render, 'chronometre', False):
+        return
+    rendre = Template.render
+
+    @wraps(rendre)
+    def render(self, context):
+        mesure = _mesure_courante.get()
+        if mesure is None or mesure.profondeur:
+            return rendre(self, context)
+        mesure.profondeur += 1
+        debut = time.perf_counter()
+        try:
+            return rendre(self, context)
+        finally:
+            mesure.profondeur -= 1
+            mesure.temps_templates += time.perf_counter() - debut
+
+    render.chronometre = True
+    Template.render = render
+
+
+@contextmanager
+def mesurer():
+    """Mesure tout ce qui s'exécute dans le bloc : with mesurer() as mesure: ..."""
+    _chronometrer_templates()
+    # Connexions ouvertes avant le chargement de ce module
+    for connexion in connections.all(initialized_only=True):
+        _instrumenter(connexion)
+    mesure = Mesure()
+    jeton = _mesure_courante.set(mesure)
+    try:
+        yield mesure
+    finally:
+        _mesure_courante.reset(jeton)
@@ -0,0 +1,112 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import ModuleType
+from unittest import mock
+
+from asgiref.sync import ThreadSensitiveContext
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.backends.utils import CursorWrapper
+from django.test import AsyncClient, Client, override_settings
+from django.urls import include, path
+
+from restaurant import urls
+
+
+def urlconf_asynchrone():
+    """Les routes du projet avec les variantes asynchrones, comme sous ASGI."""
+    module = ModuleType('urls_asgi')
+    module.urlpatterns = [
+        path('admin/', admin.site.urls),
+        path('', include(urls.asynchrones(urls.urlpatterns))),
+    ]
+    return module
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare le débit d'une page en lecture seule servie par des threads "
+        "WSGI et par sa variante asynchrone sous ASGI, avec une latence de base simulée"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='/mes-commandes/', help="Page mesurée")
+        parser.add_argument('--requetes', type=int, default=200, help="Nombre de requêtes par mode")
+        parser.add_argument('--workers', type=int, default=4,
+                            help="Threads WSGI (gunicorn --threads) servant les requêtes")
+        parser.add_argument('--concurrence', type=int, default=50,
+                            help="Requêtes en cours à la fois sous ASGI")
+        parser.add_argument('--latence', type=float, default=20,
+                            help="Millisecondes ajoutées à chaque requête SQL (aller-retour réseau)")
+        parser.add_argument('--utilisateur', help="Compte connecté (par défaut le premier client)")
+
+    def handle(self, *args, url, requetes, workers, concurrence, latence, utilisateur, **options):
+        if utilisateur:
+            user = User.objects.filter(username=utilisateur).first()
+        else:
+            user = User.objects.filter(profile__role='client').order_by('pk').first()
+        if user is None:
+            raise CommandError("Aucun utilisateur à connecter (voir --utilisateur).")
+
+        connexion = Client()
+        connexion.force_login(user)
+        cookies = connexion.cookies
+
+        execute = CursorWrapper._execute
+
+        def execute_lent(curseur, *args, **kwargs):
+            time.sleep(latence / 1000)
+            return execute(curseur, *args, **kwargs)
+
+        # Les clients de test se présentent comme « testserver »
+        with mock.patch.object(CursorWrapper, '_execute', execute_lent), \
+                override_settings(ALLOWED_HOSTS=['testserver']):
+            resultats = {
+                f'WSGI ({workers} threads)': self.mesurer_wsgi(url, requetes, workers, cookies),
+                f'ASGI ({concurrence} en cours)': asyncio.run(
+                    self.mesurer_asgi(url, requetes, concurrence, cookies)
+                ),
+            }
+
+        self.stdout.write(f"{requetes} requêtes GET {url}, {latence:g} ms de latence par requête SQL")
+        for nom, (duree, temps, statuts) in resultats.items():
+            self.stdout.write(
+                f"{nom:>22} : {requetes / duree:7.1f} req/s, "
+                f"médiane {statistics.median(temps) * 1000:6.1f} ms, "
+                f"statuts {sorted(statuts)}"
+            )
+
+    def mesurer_wsgi(self, url, requetes, workers, cookies):
+        def requete(_):
+            client = Client()
+            client.cookies = cookies
+            debut = time.perf_counter()
+            response = client.get(url)
+            return time.perf_counter() - debut, response.status_code
+
+        debut = time.perf_counter()
+        with ThreadPoolExecutor(workers) as executeur:
+            mesures = list(executeur.map(requete, range(requetes)))
+        return time.perf_counter() - debut, [t for t, _ in mesures], {s for _, s in mesures}
+
+    async def mesurer_asgi(self, url, requetes, concurrence, cookies):
+        limite = asyncio.Semaphore(concurrence)
+
+        async def requete():
+            async with limite:
+                client = AsyncClient()
+                client.cookies = cookies
+                debut = time.perf_counter()
+                # Comme ASGIHandler : le code synchrone d'une requête a son propre thread
+                async with ThreadSensitiveContext():
+                    response = await client.get(url)
+                return time.perf_counter() - debut, response.status_code
+
+        with override_settings(ROOT_URLCONF=urlconf_asynchrone()):
+            debut = time.perf_counter()
+            mesures = await asyncio.gather(*(requete() for _ in range(requetes)))
+            duree = time.perf_counter() - debut
+        return duree, [t for t, _ in mesures], {s for _, s in mesures}
@@ -0,0 +1,80 @@
+import re
+import time
+
+from django.core.management.base import BaseCommand
+
+from restaurant import moderation
+from restaurant.models import Avis
+
+EXEMPLES = [
+    "Très bon repas, le service était rapide et le dessert délicieux.",
+    "Le plat du jour manquait un peu de sel mais l'accueil était parfait. Je reviendrai avec plaisir !",
+    "Excellent rapport qualité prix, la terrasse est agréable le soir.",
+    "bof",
+    "azertyuiop",
+    "sdfghjkl qsdfgh",
+    "c'est trop booooon",
+    "mmmmmh tres bon",
+]
+
+
+def ancien_validateur(commentaire):
+    """
+    Copie de l'ancien AvisForm.clean_commentaire (six recherches et deux
+    findall), gardée comme référence : renvoie le message d'erreur ou None.
+    """
+    commentaire = commentaire.strip().lower()
+    if len(commentaire) < 5:
+        return "Votre avis est trop court."
+    if not re.search(r"[aeiouyàâéèêëîïôöûü]", commentaire):
+        return "Votre avis doit contenir des mots compréhensibles."
+    if re.search(r"[bcdfghjklmnpqrstvwxyz]{4,}", commentaire):
+        return "Votre avis semble contenir des séquences non naturelles."
+    if " " not in commentaire and len(commentaire) > 6:
+        return "Votre avis doit être une phrase ou plusieurs mots."
+    if re.search(r"(.)\1{3,}", commentaire):
+        return "Votre avis ne doit pas contenir de répétitions anormales."
+    consonnes = re.findall(r"[bcdfghjklmnpqrstvwxyz]", commentaire)
+    voyelles = re.findall(r"[aeiouyàâéèêëîïôöûü]", commentaire)
+    if len(voyelles) == 0 or (len(consonnes) / max(1, len(voyelles))) > 4:
+        return "Votre avis ne semble pas être un texte compréhensible."
+    return None
+
+
+class Command(BaseCommand):
+    help = "Compare le contrôle de qualité des avis en un parcours à l'ancien validateur par regex"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repetitions', type=int, default=200,
+                            help="Nombre de passages sur le corpus")
+        parser.add_argument('--limite', type=int, default=1000,
+                            help="Nombre maximal d'avis lus en base pour compléter le corpus")
+
+    def handle(self, *args, repetitions=200, limite=1000, **options):
+        corpus = EXEMPLES + list(
+            Avis.objects.order_by('-pk').values_list('commentaire', flat=True)[:limite]
+        )
+
+        # Les deux implémentations doivent rendre exactement les mêmes verdicts
+        differences = [
+            texte for texte in corpus
+            if ancien_validateur(texte) != moderation.evaluer(texte).message
+        ]
+        for texte in differences[:10]:
+            self.stdout.write(self.style.WARNING(f"Verdict différent : {texte[:60]!r}"))
+
+        resultats = {}
+        for nom, fonction in (('regex', ancien_validateur), ('un parcours', moderation.evaluer)):
+            debut = time.perf_counter()
+            for _ in range(repetitions):
+                for texte in corpus:
+                    fonction(texte)
+            resultats[nom] = time.perf_counter() - debut
+
+        appels = repetitions * len(corpus)
+        for nom, duree in resultats.items():
+            self.stdout.write(f"{nom:>12} : {duree * 1e6 / appels:8.2f} µs par avis ({appels} appels)")
+        self.stdout.write(
+            f"Gain : x{resultats['regex'] / resultats['un parcours']:.2f}, "
+            f"{len(differences)} verdict(s) différent(s) sur {len(corpus)} texte(s)."
+        )
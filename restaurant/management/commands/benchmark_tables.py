@@ -0,0 +1,152 @@
+import random
+import statistics
+import time
+from datetime import date, time as heure, timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+from django.test.utils import CaptureQueriesContext
+
+from restaurant import occupation
+from restaurant.models import Reservation, Table
+
+TAILLES_TABLES = (2, 2, 2, 4, 4, 4, 4, 6, 6, 8)
+# Taille des groupes : {nombre de personnes: poids}
+GROUPES = {1: 5, 2: 35, 3: 15, 4: 20, 5: 8, 6: 8, 7: 4, 8: 5}
+# Créneaux demandés : 12h00 - 13h30 et 19h00 - 21h00
+SERVICES = [
+    indice for indice, creneau in enumerate(occupation.CRENEAUX)
+    if heure(12, 0) <= creneau <= heure(13, 30) or heure(19, 0) <= creneau <= heure(21, 0)
+]
+
+
+def premiere_table(grille, tables, indice, nb_personnes, exclues=()):
+    """
+    Référence : la première table libre assez grande dans l'ordre des
+    numéros, comme un client qui clique sur le plan sans regarder les places.
+    """
+    bit = 1 << indice
+    for table_id, _, seats in tables:
+        if seats >= nb_personnes and not grille.get(table_id, 0) & bit and table_id not in exclues:
+            return table_id
+    return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare l'attribution des tables au plus juste à la première table libre "
+        "(couverts assis par service) et mesure son coût sur un mois de réservations"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tables', type=int, default=300, help="Nombre de tables")
+        parser.add_argument('--jours', type=int, default=30, help="Nombre de jours réservés")
+        parser.add_argument('--demandes', type=int,
+                            help="Demandes de réservation par jour (par défaut 1,2 par table et par créneau)")
+        parser.add_argument('--graine', type=int, default=42, help="Graine du tirage des demandes")
+
+    def handle(self, *args, tables, jours, demandes, graine, **options):
+        # Plus de demandes que de tables : le placement décide qui est assis
+        demandes = demandes or tables * len(SERVICES) * 6 // 5
+        hasard = random.Random(graine)
+        premier_jour = date.today() + timedelta(days=1)
+        calendrier = [premier_jour + timedelta(days=i) for i in range(jours)]
+        flux = {
+            jour: [
+                (hasard.choice(SERVICES), hasard.choices(list(GROUPES), weights=list(GROUPES.values()))[0])
+                for _ in range(demandes)
+            ]
+            for jour in calendrier
+        }
+
+        # Données créées le temps de la mesure, puis annulées
+        with transaction.atomic():
+            plan = self.creer_tables(tables, hasard)
+
+            resultats = {}
+            for nom, fonction in (('première libre', premiere_table), ('au plus juste', occupation.choisir_table)):
+                resultats[nom] = self.simuler(flux, plan, fonction)
+            attributions = resultats['au plus juste'][2]
+
+            self.enregistrer(attributions)
+            froid, chaud, requetes = self.mesurer(flux)
+
+            transaction.set_rollback(True)
+
+        occupation.invalider_tables()
+        cache.delete_many([occupation._cle(jour) for jour in calendrier])
+
+        places = sum(seats for _, _, seats in plan)
+        self.stdout.write(
+            f"{tables} tables ({places} places), {jours} jours, {demandes} demandes par jour "
+            f"sur {len(SERVICES)} créneaux"
+        )
+        for nom, (couverts, refus, _) in resultats.items():
+            self.stdout.write(
+                f"{nom:>16} : {couverts / (jours * len(SERVICES)):8.1f} couverts par créneau, "
+                f"{refus} demande(s) refusée(s)"
+            )
+        gain = resultats['au plus juste'][0] / max(resultats['première libre'][0], 1)
+        self.stdout.write(f"Gain en couverts : x{gain:.3f}")
+        self.stdout.write(
+            f"Attribution : grille à construire {statistics.median(froid) * 1000:.2f} ms "
+            f"(médiane, {max(requetes)} requête(s) au plus), "
+            f"grille en cache {statistics.median(chaud) * 1e6:.1f} µs, "
+            f"{sum(len(v) for v in attributions.values())} réservations en base"
+        )
+
+    def creer_tables(self, nombre, hasard):
+        depart = (Table.objects.aggregate(Max('number'))['number__max'] or 0) + 1
+        creees = Table.objects.bulk_create([
+            Table(number=depart + i, seats=hasard.choice(TAILLES_TABLES)) for i in range(nombre)
+        ])
+        return [(table.pk, table.number, table.seats) for table in creees]
+
+    def simuler(self, flux, plan, fonction):
+        """Place les demandes une à une. Renvoie (couverts, refus, {jour: [(table_id, indice, personnes)]})."""
+        couverts = refus = 0
+        attributions = {}
+        for jour, demandes in flux.items():
+            grille = {}
+            attributions[jour] = []
+            for indice, nb_personnes in demandes:
+                table_id = fonction(grille, plan, indice, nb_personnes)
+                if table_id is None:
+                    refus += 1
+                    continue
+                grille[table_id] = grille.get(table_id, 0) | (1 << indice)
+                couverts += nb_personnes
+                attributions[jour].append((table_id, indice, nb_personnes))
+        return couverts, refus, attributions
+
+    def enregistrer(self, attributions):
+        user, _ = User.objects.get_or_create(username='benchmark_tables')
+        Reservation.objects.bulk_create([
+            Reservation(user=user, table_id=table_id, date=jour,
+                        time=occupation.CRENEAUX[indice], nb_personnes=nb_personnes)
+            for jour, places in attributions.items()
+            for table_id, indice, nb_personnes in places
+        ], batch_size=500)
+        occupation.invalider_tables()
+
+    def mesurer(self, flux):
+        """Temps d'attribution par jour, grille à construire puis en cache."""
+        occupation.lister_tables()
+        froid, chaud, requetes = [], [], []
+        for jour, demandes in flux.items():
+            cache.delete(occupation._cle(jour))
+            indice, nb_personnes = demandes[0]
+            with CaptureQueriesContext(connection) as capture:
+                debut = time.perf_counter()
+                occupation.attribuer_table(jour, occupation.CRENEAUX[indice], nb_personnes)
+                froid.append(time.perf_counter() - debut)
+            requetes.append(len(capture))
+
+            for indice, nb_personnes in demandes[:100]:
+                debut = time.perf_counter()
+                occupation.attribuer_table(jour, occupation.CRENEAUX[indice], nb_personnes)
+                chaud.append(time.perf_counter() - debut)
+        return froid, chaud, requetes
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+
+from restaurant.models import Profile, PointsLedger
+
+
+class Command(BaseCommand):
+    help = "Recalcule le solde de points de chaque profil à partir du journal PointsLedger"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verifier', action='store_true',
+                            help="Affiche les écarts sans les corriger")
+        parser.add_argument('--lot', type=int, default=500,
+                            help="Nombre de profils traités par transaction")
+
+    def handle(self, *args, verifier=False, lot=500, **options):
+        ids = list(Profile.objects.order_by('pk').values_list('pk', flat=True))
+        ecarts = 0
+
+        for debut in range(0, len(ids), lot):
+            with transaction.atomic():
+                # Verrouille le lot avant de sommer le journal : un crédit concurrent
+                # attendra la fin de la transaction et s'appliquera sur le bon solde
+                profils = list(
+                    Profile.objects.select_for_update()
+                    .filter(pk__in=ids[debut:debut + lot])
+                    .only('pk', 'user_id', 'points')
+                )
+                soldes = dict(
+                    PointsLedger.objects.filter(user_id__in=[p.user_id for p in profils])
+                    .values('user_id')
+                    .annotate(total=Sum('points'))
+                    .values_list('user_id', 'total')
+                )
+
+                a_corriger = []
+                for profil in profils:
+                    solde = soldes.get(profil.user_id, 0)
+                    if profil.points != solde:
+                        self.stdout.write(f"Profil {profil.pk} : {profil.points} -> {solde}")
+                        profil.points = solde
+                        a_corriger.append(profil)
+
+                ecarts += len(a_corriger)
+                if a_corriger and not verifier:
+                    Profile.objects.bulk_update(a_corriger, ['points'])
+
+        if verifier:
+            self.stdout.write(f"{ecarts} écart(s) trouvé(s) sur {len(ids)} profil(s).")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{ecarts} solde(s) corrigé(s) sur {len(ids)} profil(s)."))
@@ -0,0 +1,42 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from restaurant import exports
+
+
+class Command(BaseCommand):
+    help = "Exporte l'historique des commandes en CSV (une ligne par plat commandé)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('fichier', nargs='?', default='-',
+                            help="Fichier CSV à écrire ('-' : sortie standard)")
+        parser.add_argument('--debut', help="Première date incluse (AAAA-MM-JJ)")
+        parser.add_argument('--fin', help="Dernière date incluse (AAAA-MM-JJ)")
+        parser.add_argument('--statut', action='append',
+                            help="Statut à exporter (répétable ou séparé par des virgules)")
+        parser.add_argument('--lot', type=int, default=exports.TAILLE_PAQUET,
+                            help="Nombre de commandes lues à la fois")
+
+    def handle(self, *args, fichier='-', debut=None, fin=None, statut=None, lot=exports.TAILLE_PAQUET, **options):
+        try:
+            debut, fin, statuts = exports.lire_filtres(debut, fin, ','.join(statut or []))
+        except ValueError as erreur:
+            raise CommandError(str(erreur))
+
+        lignes = exports.lignes(exports.commandes(debut, fin, statuts), lot)
+        if fichier == '-':
+            self.stdout.ending = None
+            nombre = self.ecrire(self.stdout, lignes)
+        else:
+            with open(fichier, 'w', encoding='utf-8', newline='') as flux:
+                nombre = self.ecrire(flux, lignes)
+            self.stderr.write(f"{nombre} ligne(s) exportée(s) dans {fichier}.")
+
+    def ecrire(self, flux, lignes):
+        ecrivain = csv.writer(flux)
+        nombre = -1  # sans l'en-tête
+        for ligne in lignes:
+            ecrivain.writerow(ligne)
+            nombre += 1
+        return nombre
@@ -0,0 +1,70 @@
+import json
+from pathlib import Path
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from restaurant import images
+from restaurant.models import Plat
+
+EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp')
+
+
+class Command(BaseCommand):
+    help = "Produit les versions réduites (WebP et JPEG) des photos de plats"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tous', action='store_true',
+                            help="Retraite aussi les plats déjà traités (les fichiers existants sont gardés)")
+        parser.add_argument('--statiques', action='store_true',
+                            help="Traite aussi les images fournies dans static/restaurant/images")
+
+    def handle(self, *args, tous=False, statiques=False, **options):
+        plats = Plat.objects.exclude(image='').exclude(image__isnull=True)
+        if not tous:
+            plats = plats.filter(image_empreinte='')
+
+        traites = 0
+        for plat in plats.iterator(chunk_size=100):
+            try:
+                images.deriver_plat(plat)
+            except (OSError, ValueError) as e:
+                self.stderr.write(f"Plat #{plat.pk} ({plat.image.name}) ignoré : {e}")
+                continue
+            Plat.objects.filter(pk=plat.pk).update(
+                image_empreinte=plat.image_empreinte, image_largeur=plat.image_largeur,
+                date_modification=timezone.now(),
+            )
+            traites += 1
+        self.stdout.write(self.style.SUCCESS(f"{traites} photo(s) de plat traitée(s)."))
+
+        if statiques:
+            self.traiter_statiques()
+
+    def traiter_statiques(self):
+        racine = Path(apps.get_app_config('restaurant').path) / 'static'
+        source = racine / 'restaurant' / 'images'
+        storage = FileSystemStorage(location=racine)
+
+        manifeste = {}
+        ecrits = 0
+        for chemin in sorted(source.iterdir()):
+            if chemin.suffix.lower() not in EXTENSIONS:
+                continue
+            with chemin.open('rb') as fichier:
+                base = f'{chemin.stem}.{images.empreinte(fichier)}'
+                largeur, nombre = images.generer(fichier, images.DOSSIER_STATIQUES, base, storage)
+            manifeste[chemin.name] = {'base': base, 'largeur': largeur}
+            ecrits += nombre
+
+        chemin_manifeste = Path(storage.path(images.MANIFESTE_STATIQUES))
+        chemin_manifeste.parent.mkdir(parents=True, exist_ok=True)
+        with chemin_manifeste.open('w', encoding='utf-8') as fichier:
+            json.dump(manifeste, fichier, indent=2, sort_keys=True)
+            fichier.write('\n')
+        images.manifeste_statiques.cache_clear()
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(manifeste)} image(s) fournie(s) traitée(s), {ecrits} fichier(s) écrit(s)."
+        ))
@@ -0,0 +1,251 @@
+import csv
+import json
+import sys
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from restaurant import catalogue
+from restaurant.models import Categorie, Plat
+
+COLONNES = ['categorie', 'type', 'nom', 'description', 'prix', 'disponible', 'image']
+FORMATS = ['csv', 'json', 'jsonl']
+VRAI = {'1', 'true', 'vrai', 'oui', 'yes'}
+FAUX = {'0', 'false', 'faux', 'non', 'no', ''}
+
+
+def lire(flux, format_):
+    """Lignes du catalogue une par une (sauf 'json', un tableau lu d'un bloc)."""
+    if format_ == 'csv':
+        yield from csv.DictReader(flux)
+    elif format_ == 'jsonl':
+        for ligne in flux:
+            if ligne.strip():
+                yield json.loads(ligne)
+    else:
+        yield from json.load(flux)
+
+
+def lots(iterable, taille):
+    iterateur = iter(iterable)
+    while lot := list(islice(iterateur, taille)):
+        yield lot
+
+
+class Command(BaseCommand):
+    help = (
+        "Importe (en diff par catégorie + nom) ou exporte le menu complet "
+        "au format CSV, JSON ou JSON Lines"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['importer', 'exporter'])
+        parser.add_argument('fichier', nargs='?', default='-',
+                            help="Fichier à lire ou écrire ('-' : entrée/sortie standard)")
+        parser.add_argument('--format', choices=FORMATS,
+                            help="Format du fichier (déduit de l'extension par défaut, sinon csv)")
+        parser.add_argument('--lot', type=int, default=500,
+                            help="Nombre de plats lus, créés ou mis à jour à la fois")
+        parser.add_argument('--retirer-absents', action='store_true',
+                            help="Rend indisponibles les plats absents du fichier (changement de carte)")
+        parser.add_argument('--verifier', action='store_true',
+                            help="Calcule les changements sans les enregistrer")
+
+    def handle(self, *args, action, fichier, format=None, lot=500, **options):
+        if format is None:
+            extension = fichier.rsplit('.', 1)[-1].lower()
+            format = extension if extension in FORMATS else 'csv'
+
+        if action == 'exporter':
+            if fichier == '-':
+                # Comme dumpdata : le flux est écrit tel quel, sans fin de ligne ajoutée
+                self.stdout.ending = None
+                self.exporter(self.stdout, format, lot)
+            else:
+                with open(fichier, 'w', encoding='utf-8', newline='') as flux:
+                    self.exporter(flux, format, lot)
+                self.stderr.write(f"Menu exporté dans {fichier}.")
+            return
+
+        if fichier == '-':
+            self.importer(sys.stdin, format, lot, **options)
+        else:
+            try:
+                with open(fichier, encoding='utf-8', newline='') as flux:
+                    self.importer(flux, format, lot, **options)
+            except FileNotFoundError:
+                raise CommandError(f"Fichier introuvable : {fichier}")
+
+    # ============================================
+    # EXPORT
+    # ============================================
+
+    def exporter(self, flux, format_, lot):
+        requete = (
+            Plat.objects.select_related('categorie')
+            .order_by('categorie__type', 'categorie__nom', 'nom', 'pk')
+        )
+        lignes = (
+            {
+                'categorie': plat.categorie.nom,
+                'type': plat.categorie.type,
+                'nom': plat.nom,
+                'description': plat.description,
+                'prix': str(plat.prix),
+                'disponible': plat.disponible,
+                'image': plat.image.name if plat.image else '',
+            }
+            for plat in requete.iterator(chunk_size=lot)
+        )
+
+        if format_ == 'csv':
+            ecrivain = csv.DictWriter(flux, fieldnames=COLONNES)
+            ecrivain.writeheader()
+            for ligne in lignes:
+                ligne['disponible'] = int(ligne['disponible'])
+                ecrivain.writerow(ligne)
+        elif format_ == 'jsonl':
+            for ligne in lignes:
+                flux.write(json.dumps(ligne, ensure_ascii=False) + '\n')
+        else:
+            # Tableau écrit élément par élément : rien n'est gardé en mémoire
+            flux.write('[')
+            for i, ligne in enumerate(lignes):
+                flux.write((',\n ' if i else '\n ') + json.dumps(ligne, ensure_ascii=False))
+            flux.write('\n]\n')
+
+    # ============================================
+    # IMPORT
+    # ============================================
+
+    def valider(self, numero, ligne):
+        try:
+            categorie = str(ligne['categorie']).strip()
+            nom = str(ligne['nom']).strip()
+            prix = Decimal(str(ligne['prix']).strip().replace(',', '.')).quantize(Decimal('0.01'))
+        except (KeyError, TypeError, AttributeError, InvalidOperation):
+            raise CommandError(f"Ligne {numero} : catégorie, nom et prix sont obligatoires.")
+        if not categorie or not nom or prix < 0:
+            raise CommandError(f"Ligne {numero} : catégorie, nom ou prix invalide.")
+
+        type_ = str(ligne.get('type') or '').strip()
+        if type_ and type_ not in dict(Categorie.TYPES):
+            raise CommandError(f"Ligne {numero} : type de catégorie inconnu '{type_}'.")
+
+        disponible = ligne.get('disponible', True)
+        if not isinstance(disponible, bool):
+            valeur = str(disponible).strip().lower()
+            if valeur not in VRAI | FAUX:
+                raise CommandError(f"Ligne {numero} : valeur 'disponible' invalide.")
+            disponible = valeur in VRAI
+
+        return {
+            'categorie': categorie,
+            'type': type_,
+            'nom': nom,
+            'description': str(ligne.get('description') or ''),
+            'prix': prix,
+            'disponible': disponible,
+        }
+
+    def importer(self, flux, format_, lot, retirer_absents=False, verifier=False, **options):
+        crees = modifies = inchanges = 0
+        # Les opérations en masse ne renseignent pas date_modification (auto_now),
+        # dont dépend la version du menu dans tous les processus (catalogue.py)
+        maintenant = timezone.now()
+
+        with transaction.atomic():
+            # Les catégories sont peu nombreuses ; les plats sont indexés par
+            # clé naturelle (catégorie, nom) en ne lisant que les champs comparés
+            categories = {}
+            for categorie in Categorie.objects.order_by('pk'):
+                categories.setdefault(categorie.nom, categorie)
+            existants = {}
+            for plat in Plat.objects.order_by('pk').only(
+                'pk', 'nom', 'description', 'prix', 'disponible', 'categorie_id'
+            ).iterator(chunk_size=lot):
+                existants.setdefault((plat.categorie_id, plat.nom), plat)
+
+            vus = set()
+            lignes = enumerate(lire(flux, format_), start=1)
+            try:
+                for paquet in lots(lignes, lot):
+                    donnees = [self.valider(numero, ligne) for numero, ligne in paquet]
+
+                    nouvelles = []
+                    for ligne in donnees:
+                        if ligne['categorie'] not in categories:
+                            if not ligne['type']:
+                                raise CommandError(
+                                    f"Catégorie '{ligne['categorie']}' inconnue : précisez son type."
+                                )
+                            categorie = Categorie(nom=ligne['categorie'], type=ligne['type'])
+                            categories[categorie.nom] = categorie
+                            nouvelles.append(categorie)
+                    Categorie.objects.bulk_create(nouvelles)
+
+                    a_creer, a_modifier = [], []
+                    for ligne in donnees:
+                        cle = (categories[ligne['categorie']].pk, ligne['nom'])
+                        if cle in vus:
+                            continue
+                        vus.add(cle)
+                        plat = existants.get(cle)
+                        if plat is None:
+                            a_creer.append(Plat(
+                                categorie=categories[ligne['categorie']],
+                                nom=ligne['nom'],
+                                description=ligne['description'],
+                                prix=ligne['prix'],
+                                disponible=ligne['disponible'],
+                            ))
+                        elif (plat.description, plat.prix, plat.disponible) != (
+                            ligne['description'], ligne['prix'], ligne['disponible']
+                        ):
+                            plat.description = ligne['description']
+                            plat.prix = ligne['prix']
+                            plat.disponible = ligne['disponible']
+                            plat.date_modification = maintenant
+                            a_modifier.append(plat)
+                        else:
+                            inchanges += 1
+
+                    Plat.objects.bulk_create(a_creer)
+                    Plat.objects.bulk_update(
+                        a_modifier, ['description', 'prix', 'disponible', 'date_modification']
+                    )
+                    crees += len(a_creer)
+                    modifies += len(a_modifier)
+            except (ValueError, csv.Error) as erreur:
+                raise CommandError(f"Fichier illisible : {erreur}")
+
+            retires = []
+            if retirer_absents:
+                retires = [
+                    plat for cle, plat in existants.items()
+                    if cle not in vus and plat.disponible
+                ]
+                for plat in retires:
+                    plat.disponible = False
+                    plat.date_modification = maintenant
+                Plat.objects.bulk_update(retires, ['disponible', 'date_modification'], batch_size=lot)
+
+            if verifier:
+                transaction.set_rollback(True)
+            elif crees or modifies or retires:
+                # Les opérations en masse n'envoient pas de signaux : la version
+                # gardée en cache est oubliée ici, les autres processus relisent
+                # les dates de modification à l'échéance de la leur
+                catalogue.invalider_menu()
+
+        bilan = (
+            f"{crees} plat(s) créé(s), {modifies} modifié(s), {inchanges} inchangé(s)"
+            + (f", {len(retires)} retiré(s) de la carte" if retirer_absents else "")
+        )
+        if verifier:
+            self.stdout.write(f"Vérification seulement : {bilan}.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{bilan}."))
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+
+from restaurant import moderation
+from restaurant.models import Avis
+
+
+class Command(BaseCommand):
+    help = "Repasse tous les avis existants dans le contrôle de qualité et marque les suspects"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verifier', action='store_true',
+                            help="Affiche les avis concernés sans les marquer")
+        parser.add_argument('--lot', type=int, default=1000,
+                            help="Nombre d'avis lus et mis à jour à la fois")
+
+    def handle(self, *args, verifier=False, lot=1000, **options):
+        # Lecture en flux : seuls les champs utiles, jamais toute la table en mémoire
+        requete = Avis.objects.order_by('pk').only('pk', 'commentaire', 'suspect')
+        total = 0
+        suspects = 0
+        motifs = {}
+        # {nouvelle valeur de suspect: [pk, ...]} : seuls les avis dont le
+        # marquage change sont réécrits
+        a_modifier = {True: [], False: []}
+
+        for avis in requete.iterator(chunk_size=lot):
+            total += 1
+            verdict = moderation.evaluer(avis.commentaire)
+            if not verdict.accepte:
+                suspects += 1
+                motifs[verdict.motif] = motifs.get(verdict.motif, 0) + 1
+                if verifier:
+                    self.stdout.write(f"Avis {avis.pk} : {verdict.message}")
+
+            if avis.suspect == verdict.accepte:
+                pks = a_modifier[not verdict.accepte]
+                pks.append(avis.pk)
+                if len(pks) >= lot:
+                    self.marquer(pks, not verdict.accepte, verifier)
+                    pks.clear()
+
+        for suspect, pks in a_modifier.items():
+            self.marquer(pks, suspect, verifier)
+
+        for motif, nombre in sorted(motifs.items()):
+            self.stdout.write(f"  {motif} : {nombre}")
+        if verifier:
+            self.stdout.write(f"{suspects} avis suspect(s) sur {total}.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{suspects} avis suspect(s) sur {total}."))
+
+    def marquer(self, pks, suspect, verifier):
+        # update() n'envoie pas de signaux : les statistiques ne bougent pas
+        if pks and not verifier:
+            Avis.objects.filter(pk__in=pks).update(suspect=suspect)
@@ -0,0 +1,25 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from restaurant import ventes
+
+
+class Command(BaseCommand):
+    help = "Recalcule les agrégats des ventes (par jour et par heure) à partir des commandes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--debut', help="Premier jour recalculé (AAAA-MM-JJ), tout l'historique par défaut")
+        parser.add_argument('--fin', help="Dernier jour recalculé (AAAA-MM-JJ)")
+
+    def handle(self, *args, debut=None, fin=None, **options):
+        try:
+            debut = date.fromisoformat(debut) if debut else None
+            fin = date.fromisoformat(fin) if fin else None
+        except ValueError:
+            raise CommandError("Les dates doivent être au format AAAA-MM-JJ.")
+        if debut and fin and debut > fin:
+            raise CommandError("La date de début doit précéder la date de fin.")
+
+        nombre = ventes.reconstruire(debut, fin)
+        self.stdout.write(self.style.SUCCESS(f"{nombre} agrégat(s) horaire(s) recalculé(s)."))
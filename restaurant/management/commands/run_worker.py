@@ -0,0 +1,55 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from restaurant import taches
+
+PURGE_INTERVALLE = 60 * 60  # secondes
+
+
+class Command(BaseCommand):
+    help = "Exécute les tâches différées (points, compteurs, agrégats des ventes) jusqu'à l'arrêt"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--une-fois', action='store_true',
+                            help="Vide la file puis s'arrête (tâche planifiée, tests)")
+        parser.add_argument('--lot', type=int, default=taches.LOT,
+                            help="Nombre de tâches réservées à la fois")
+        parser.add_argument('--attente', type=float, default=1.0,
+                            help="Secondes entre deux lectures d'une file vide")
+
+    def handle(self, *args, une_fois=False, lot=taches.LOT, attente=1.0, **options):
+        self.arret = False
+        precedent = signal.signal(signal.SIGTERM, self.arreter)
+        reservees = terminees = 0
+        prochaine_purge = 0.0
+
+        try:
+            while not self.arret:
+                # Processus de longue durée : connexions expirées ou cassées remplacées
+                close_old_connections()
+                if time.monotonic() >= prochaine_purge:
+                    taches.purger()
+                    prochaine_purge = time.monotonic() + PURGE_INTERVALLE
+
+                lot_reserve, lot_termine = taches.traiter(lot)
+                reservees += lot_reserve
+                terminees += lot_termine
+                if not lot_reserve:
+                    if une_fois:
+                        break
+                    time.sleep(attente)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            signal.signal(signal.SIGTERM, precedent)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{terminees} tâche(s) terminée(s), {reservees - terminees} en échec."
+        ))
+
+    def arreter(self, signum, frame):
+        # Le lot en cours est terminé avant l'arrêt
+        self.arret = True
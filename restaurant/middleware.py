@@ -1,18 +1,254 @@
-class NoCacheMiddleware:
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import instrumentation, routers
+
+logger = logging.getLogger('restaurant.instrumentation')
+
+
+class HybrideMixin:
     """
-    Middleware pour empêcher la mise en cache des pages sensibles
-    lorsqu'un utilisateur est connecté.
+    Middleware synchrone ou asynchrone selon la chaîne qui l'entoure, comme
+    MiddlewareMixin, mais sans passer par un thread sous ASGI : la variante
+    asynchrone est la méthode __acall__ de la classe.
     """
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        response = self.get_response(request)
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.traiter(request)
+
+
+class StatiquesMiddleware(HybrideMixin, WhiteNoiseMiddleware):
+    """
+    WhiteNoise, utilisable aussi en tête d'une chaîne asynchrone : seuls les
+    fichiers statiques sont servis dans un thread, les autres requêtes
+    continuent sans quitter la boucle d'événements.
+    """
+    def __init__(self, get_response):
+        WhiteNoiseMiddleware.__init__(self, get_response)
+        HybrideMixin.__init__(self, get_response)
+
+    def traiter(self, request):
+        return WhiteNoiseMiddleware.__call__(self, request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
 
+class NoCacheMiddleware(HybrideMixin):
+    """
+    Middleware pour empêcher la mise en cache des pages sensibles
+    lorsqu'un utilisateur est connecté.
+
+    Une page qui porte un ETag (voir pages.py) peut être gardée par le
+    navigateur, qui doit la revalider à chaque affichage : elle n'est alors
+    retransférée que si elle a changé.
+    """
+    def traiter(self, request):
+        return self.entetes(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.entetes(request, await self.get_response(request))
+
+    def entetes(self, request, response):
+        if response.has_header('ETag'):
+            # Réponse 304 comprise : gardée, mais revalidée à chaque fois
+            prive = 'private, ' if request.user.is_authenticated else ''
+            response['Cache-Control'] = f'{prive}no-cache'
         # Si l'utilisateur est connecté, empêche la mise en cache
-        if request.user.is_authenticated:
+        elif request.user.is_authenticated:
             response['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
             response['Pragma'] = 'no-cache'
             response['Expires'] = '0'
 
         return response
+
+
+CLE_SESSION_ROLE = 'role'
+
+
+class ProfileMiddleware(HybrideMixin):
+    """
+    Résout une seule fois par requête le rôle de l'utilisateur connecté,
+    exposé dans request.role pour les décorateurs et les vues.
+
+    Avec ProfileBackend, le profil arrive dans la même requête que
+    l'utilisateur. Le rôle est aussi gardé dans la session : il sert quand le
+    profil n'a pas été joint (session ouverte avec un autre backend) et il est
+    corrigé dès qu'il ne correspond plus au profil chargé (changement de rôle).
+
+    Sous ASGI, l'utilisateur est chargé ici avec request.auser() et remplace
+    l'objet paresseux de request.user : les vues asynchrones et les
+    middlewares suivants le lisent sans accès synchrone à la base.
+    """
+    def traiter(self, request):
+        request.role = None
+
+        user = request.user
+        if user.is_authenticated:
+            role_session = request.session.get(CLE_SESSION_ROLE)
+
+            if 'profile' in user._state.fields_cache or role_session is None:
+                profile = getattr(user, 'profile', None)
+                request.role = profile.role if profile else None
+                if role_session != request.role:
+                    request.session[CLE_SESSION_ROLE] = request.role
+            else:
+                request.role = role_session
+
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        request.role = None
+
+        # auser() charge aussi la session, lue ensuite sans requête
+        user = request.user = await request.auser()
+        if user.is_authenticated:
+            # Le gabarit de base lit user.profile : il doit être chargé avant
+            # le rendu, qui ne peut plus interroger la base
+            if 'profile' in user._state.fields_cache:
+                profile = user._state.fields_cache['profile']
+            else:
+                profile = await sync_to_async(getattr)(user, 'profile', None)
+            request.role = profile.role if profile else None
+            if await request.session.aget(CLE_SESSION_ROLE) != request.role:
+                await request.session.aset(CLE_SESSION_ROLE, request.role)
+
+        return await self.get_response(request)
+
+
+class LectureReplicaMiddleware(HybrideMixin):
+    """
+    Suit la politique de lecture de chaque requête (voir routers.py).
+
+    Placé après la session et l'authentification : ces lectures et
+    l'enregistrement de la session restent sur la base principale et ne
+    comptent pas comme des écritures. Une requête qui a écrit pose le cookie
+    COOKIE_STICKY pour REPLICA_FENETRE_STICKY secondes ; tant qu'il est
+    présent, les lectures de ce navigateur restent sur la base principale.
+
+    L'état est une variable de contexte : sous ASGI, sync_to_async la recopie
+    dans le thread où s'exécutent les requêtes de la vue.
+    """
+    def traiter(self, request):
+        etat, jeton = routers.ouvrir(routers.COOKIE_STICKY in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.fermer(jeton)
+        return self.poser_cookie(etat, response)
+
+    async def __acall__(self, request):
+        etat, jeton = routers.ouvrir(routers.COOKIE_STICKY in request.COOKIES)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routers.fermer(jeton)
+        return self.poser_cookie(etat, response)
+
+    def poser_cookie(self, etat, response):
+        if etat.ecriture and routers.replica_disponible():
+            response.set_cookie(
+                routers.COOKIE_STICKY, '1',
+                max_age=routers.fenetre_sticky(),
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+
+class InstrumentationMiddleware(HybrideMixin):
+    """
+    Mesure chaque requête (nombre et durée des requêtes SQL, rendu des
+    templates, vue, total) et l'expose dans l'en-tête Server-Timing.
+    Au-delà de INSTRUMENTATION_SEUIL_MS, la requête est journalisée avec le
+    nom de l'URL résolue.
+
+    Sous ASGI, les requêtes SQL exécutées par sync_to_async dans un autre
+    thread sont comptées aussi (voir instrumentation.py).
+
+    Activé seulement si settings.INSTRUMENTATION est vrai.
+    """
+    def __init__(self, get_response):
+        if not getattr(settings, 'INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.seuil = getattr(settings, 'INSTRUMENTATION_SEUIL_MS', 500)
+        if iscoroutinefunction(self):
+            # Sinon Django l'appellerait dans un thread, compté dans la vue
+            self.process_view = self.aprocess_view
+
+    def traiter(self, request):
+        debut = time.perf_counter()
+        request._debut_vue = None
+        with instrumentation.mesurer() as mesure:
+            response = self.get_response(request)
+        return self.rapporter(request, response, mesure, debut)
+
+    async def __acall__(self, request):
+        debut = time.perf_counter()
+        request._debut_vue = None
+        with instrumentation.mesurer() as mesure:
+            response = await self.get_response(request)
+        return self.rapporter(request, response, mesure, debut)
+
+    def rapporter(self, request, response, mesure, debut):
+        fin = time.perf_counter()
+
+        total = (fin - debut) * 1000
+        vue = (fin - request._debut_vue) * 1000 if request._debut_vue else 0.0
+        sql = mesure.temps_sql * 1000
+        templates = mesure.temps_templates * 1000
+
+        response['Server-Timing'] = ', '.join([
+            f'sql;dur={sql:.1f};desc="{mesure.requetes} requetes"',
+            f'tpl;dur={templates:.1f}',
+            f'vue;dur={vue:.1f}',
+            f'total;dur={total:.1f}',
+        ])
+
+        if total >= self.seuil:
+            correspondance = request.resolver_match
+            donnees = {
+                'url': correspondance.view_name if correspondance else None,
+                'methode': request.method,
+                'chemin': request.path,
+                'statut': response.status_code,
+                'requetes': mesure.requetes,
+                'sql_ms': round(sql, 1),
+                'templates_ms': round(templates, 1),
+                'vue_ms': round(vue, 1),
+                'total_ms': round(total, 1),
+            }
+            logger.warning(
+                "Requête lente : %s", ' '.join(f'{cle}={valeur}' for cle, valeur in donnees.items()),
+                extra={'instrumentation': donnees},
+            )
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Tout ce qui suit (middlewares internes compris) compte comme la vue
+        request._debut_vue = time.perf_counter()
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        request._debut_vue = time.perf_counter()
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def ouvrir_journal(apps, schema_editor):
+    """Reprend les soldes existants comme premier mouvement du journal"""
+    Profile = apps.get_model('restaurant', 'Profile')
+    PointsLedger = apps.get_model('restaurant', 'PointsLedger')
+    PointsLedger.objects.bulk_create([
+        PointsLedger(user_id=user_id, points=points, motif='solde_initial')
+        for user_id, points in Profile.objects.exclude(points=0).values_list('user_id', 'points')
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0008_employeinfo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PointsLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.IntegerField()),
+                ('motif', models.CharField(choices=[('solde_initial', 'Solde initial'), ('commande', 'Commande'), ('ajustement', 'Ajustement')], max_length=20)),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('commande', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='mouvements_points', to='restaurant.commande')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mouvements_points', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Mouvement de points',
+                'verbose_name_plural': 'Mouvements de points',
+                'ordering': ['-date_creation'],
+            },
+        ),
+        migrations.RunPython(ouvrir_journal, migrations.RunPython.noop),
+    ]
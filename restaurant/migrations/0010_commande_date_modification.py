@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:31
+
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def initialiser_date_modification(apps, schema_editor):
+    Commande = apps.get_model('restaurant', 'Commande')
+    Commande.objects.update(date_modification=F('date_creation'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0009_pointsledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='commande',
+            name='date_modification',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(initialiser_date_modification, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:20
+
+from django.db import migrations, models
+
+
+def calculer_statistiques(apps, schema_editor):
+    Avis = apps.get_model('restaurant', 'Avis')
+    StatistiquesAvis = apps.get_model('restaurant', 'StatistiquesAvis')
+    compteurs = dict(
+        Avis.objects.order_by().values('note').annotate(n=models.Count('id')).values_list('note', 'n')
+    )
+    StatistiquesAvis.objects.create(
+        pk=1,
+        nb_avis=sum(compteurs.values()),
+        somme_notes=sum(note * n for note, n in compteurs.items()),
+        **{f'note_{note}': compteurs.get(note, 0) for note in range(1, 6)}
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0010_commande_date_modification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatistiquesAvis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nb_avis', models.PositiveIntegerField(default=0)),
+                ('somme_notes', models.PositiveIntegerField(default=0)),
+                ('note_1', models.PositiveIntegerField(default=0)),
+                ('note_2', models.PositiveIntegerField(default=0)),
+                ('note_3', models.PositiveIntegerField(default=0)),
+                ('note_4', models.PositiveIntegerField(default=0)),
+                ('note_5', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Statistiques des avis',
+                'verbose_name_plural': 'Statistiques des avis',
+            },
+        ),
+        migrations.RunPython(calculer_statistiques, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def calculer_statistiques(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Commande = apps.get_model('restaurant', 'Commande')
+    Reservation = apps.get_model('restaurant', 'Reservation')
+    Avis = apps.get_model('restaurant', 'Avis')
+    StatistiquesClient = apps.get_model('restaurant', 'StatistiquesClient')
+
+    def par_user(queryset, **agregats):
+        return {ligne.pop('user_id'): ligne for ligne in queryset.order_by().values('user_id').annotate(**agregats)}
+
+    commandes = par_user(
+        Commande.objects,
+        nb=models.Count('id'),
+        depenses=models.Sum('montant_total', filter=~models.Q(statut='annulee')),
+    )
+    reservations = par_user(Reservation.objects, nb=models.Count('id'))
+    avis = par_user(Avis.objects, nb=models.Count('id'))
+
+    StatistiquesClient.objects.bulk_create([
+        StatistiquesClient(
+            user_id=user_id,
+            nb_commandes=commandes.get(user_id, {}).get('nb', 0),
+            depenses_totales=commandes.get(user_id, {}).get('depenses') or 0,
+            nb_reservations=reservations.get(user_id, {}).get('nb', 0),
+            nb_avis=avis.get(user_id, {}).get('nb', 0),
+        )
+        for user_id in User.objects.values_list('id', flat=True)
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0011_statistiquesavis'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatistiquesClient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nb_commandes', models.PositiveIntegerField(default=0)),
+                ('depenses_totales', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('nb_reservations', models.PositiveIntegerField(default=0)),
+                ('nb_avis', models.PositiveIntegerField(default=0)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='statistiques', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Statistiques client',
+                'verbose_name_plural': 'Statistiques clients',
+            },
+        ),
+        migrations.RunPython(calculer_statistiques, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0012_statistiquesclient'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='avis',
+            name='suspect',
+            field=models.BooleanField(default=False, verbose_name='Suspect'),
+        ),
+    ]
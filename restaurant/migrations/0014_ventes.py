@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:40
+
+from django.db import migrations, models
+
+
+def calculer_ventes(apps, schema_editor):
+    from restaurant import ventes
+    ventes.reconstruire(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0013_avis_suspect'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VentesHeure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('total', 'Total'), ('categorie', 'Catégorie'), ('plat', 'Plat')], max_length=10)),
+                ('objet_id', models.PositiveIntegerField(default=0)),
+                ('chiffre_affaires', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('nb_commandes', models.IntegerField(default=0)),
+                ('quantite', models.IntegerField(default=0)),
+                ('jour', models.DateField()),
+                ('heure', models.PositiveSmallIntegerField()),
+            ],
+            options={
+                'verbose_name': "Ventes de l'heure",
+                'verbose_name_plural': 'Ventes par heure',
+                'constraints': [models.UniqueConstraint(fields=('jour', 'heure', 'dimension', 'objet_id'), name='ventes_heure_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='VentesJour',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('total', 'Total'), ('categorie', 'Catégorie'), ('plat', 'Plat')], max_length=10)),
+                ('objet_id', models.PositiveIntegerField(default=0)),
+                ('chiffre_affaires', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('nb_commandes', models.IntegerField(default=0)),
+                ('quantite', models.IntegerField(default=0)),
+                ('jour', models.DateField()),
+            ],
+            options={
+                'verbose_name': 'Ventes du jour',
+                'verbose_name_plural': 'Ventes par jour',
+                'constraints': [models.UniqueConstraint(fields=('jour', 'dimension', 'objet_id'), name='ventes_jour_unique')],
+            },
+        ),
+        migrations.RunPython(calculer_ventes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0014_ventes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='avis',
+            index=models.Index(fields=['-date_creation', '-id'], name='avis_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commande',
+            index=models.Index(fields=['user', '-date_creation'], name='commande_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commande',
+            index=models.Index(fields=['statut', '-date_creation'], name='commande_statut_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='plat',
+            index=models.Index(condition=models.Q(('disponible', True)), fields=['categorie'], name='plat_disponible_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['user', '-date', '-time'], name='reservation_user_date_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0015_index_requetes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plat',
+            name='image_empreinte',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='plat',
+            name='image_largeur',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:24
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0016_plat_image_derives'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom', models.CharField(max_length=100)),
+                ('arguments', models.JSONField(blank=True, default=dict)),
+                ('statut', models.CharField(choices=[('a_faire', 'À faire'), ('en_cours', 'En cours'), ('terminee', 'Terminée'), ('echouee', 'Échouée')], default='a_faire', max_length=20)),
+                ('executer_apres', models.DateTimeField(default=django.utils.timezone.now)),
+                ('tentatives', models.PositiveSmallIntegerField(default=0)),
+                ('tentatives_max', models.PositiveSmallIntegerField(default=5)),
+                ('jeton', models.CharField(blank=True, max_length=32)),
+                ('reservee_jusqu_a', models.DateTimeField(blank=True, null=True)),
+                ('derniere_erreur', models.TextField(blank=True)),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('date_fin', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Tâche',
+                'verbose_name_plural': 'Tâches',
+                'indexes': [models.Index(fields=['statut', 'executer_apres'], name='tache_file_idx'), models.Index(fields=['jeton'], name='tache_jeton_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:38
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0017_tache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='nb_personnes',
+            field=models.PositiveSmallIntegerField(default=2, validators=[django.core.validators.MinValueValidator(1)]),
+        ),
+    ]
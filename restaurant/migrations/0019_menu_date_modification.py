@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0018_reservation_nb_personnes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='categorie',
+            name='date_modification',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='plat',
+            name='date_modification',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
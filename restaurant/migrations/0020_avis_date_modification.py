@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0019_menu_date_modification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='avis',
+            name='date_modification',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0020_avis_date_modification'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='commande',
+            name='commande_statut_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='commande',
+            index=models.Index(condition=models.Q(('statut__in', ('en_attente', 'en_preparation'))), fields=['statut', '-date_creation'], name='commande_statut_date_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:41
+
+from django.db import migrations, models
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Cast
+
+
+def marquer_commandes_comptees(apps, schema_editor):
+    # Les commandes existantes ont été comptées, sauf celles dont la tâche
+    # attend encore le worker : il posera la marque lui-même
+    Commande = apps.get_model('restaurant', 'Commande')
+    Tache = apps.get_model('restaurant', 'Tache')
+    en_attente = Tache.objects.filter(
+        nom='commande_creee', statut__in=('a_faire', 'en_cours'),
+    ).annotate(
+        valeur=Cast(KeyTextTransform('commande_id', 'arguments'), models.IntegerField())
+    ).values('valeur')
+    Commande.objects.exclude(pk__in=en_attente).update(effets_appliques=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0021_commande_statut_date_idx_partiel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='commande',
+            name='effets_appliques',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(marquer_commandes_comptees, migrations.RunPython.noop),
+    ]
@@ -1,12 +1,81 @@
-from django.db import models
+import copy
+
+from asgiref.sync import sync_to_async
+from django.db import models, transaction
+from django.core.validators import MinValueValidator
+from django.db.models import F
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Cast
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
-from django.dispatch import receiver
 from django.utils import timezone
 from decimal import Decimal
 
+# ======================== SUIVI DES VALEURS INITIALES ========================
+class SuiviChampsMixin:
+    """
+    Mémorise, au chargement depuis la base, la valeur des champs listés dans
+    `champs_suivis` pour que les signaux puissent comparer avant / après.
+    """
+    champs_suivis = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.memoriser_valeurs()
+        return instance
+
+    def memoriser_valeurs(self):
+        # __dict__ pour ne pas déclencher le chargement d'un champ différé
+        self._valeurs_initiales = {champ: self.__dict__.get(champ) for champ in self.champs_suivis}
+
+    def valeur_initiale(self, champ):
+        return getattr(self, '_valeurs_initiales', {}).get(champ)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.memoriser_valeurs()
+
+
+class SauvegardePartielleMixin(SuiviChampsMixin):
+    """
+    Suit tous les champs du modèle : save() n'écrit que ceux qui ont changé
+    depuis le chargement (ou la dernière sauvegarde) et ne fait rien si aucun
+    n'a changé. Les compteurs mis à jour par F() ne sont donc jamais écrasés.
+    """
+
+    def memoriser_valeurs(self, champs=None):
+        if champs is None or not hasattr(self, '_valeurs_initiales'):
+            champs = [f.attname for f in self._meta.concrete_fields if not f.primary_key]
+            self._valeurs_initiales = {}
+        for champ in champs:
+            # Copie pour détecter aussi les modifications en place (JSONField)
+            self._valeurs_initiales[champ] = copy.deepcopy(self.__dict__.get(champ))
+
+    def champs_modifies(self):
+        return [
+            f.name for f in self._meta.concrete_fields
+            if not f.primary_key
+            and self.__dict__.get(f.attname) != self._valeurs_initiales.get(f.attname)
+        ]
+
+    def save(self, *args, **kwargs):
+        if (not self._state.adding and hasattr(self, '_valeurs_initiales')
+                and not args and kwargs.get('update_fields') is None):
+            modifies = self.champs_modifies()
+            if not modifies:
+                return
+            kwargs['update_fields'] = modifies
+        super().save(*args, **kwargs)
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self.memoriser_valeurs(
+            None if fields is None else [self._meta.get_field(f).attname for f in fields]
+        )
+
+
 # ======================== PROFILE (EXTENSION USER) ========================
-class Profile(models.Model):
+class Profile(SauvegardePartielleMixin, models.Model):
     ROLE_CHOICES = [
         ('client', 'Client'),
         ('employe', 'Employé'),
@@ -31,14 +100,21 @@ class Table(models.Model):
 
 
 # ======================== RESERVATIONS ========================
-class Reservation(models.Model):
+class Reservation(SuiviChampsMixin, models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     table = models.ForeignKey(Table, on_delete=models.CASCADE)
     date = models.DateField()
     time = models.TimeField()
+    nb_personnes = models.PositiveSmallIntegerField(default=2, validators=[MinValueValidator(1)])
+
+    champs_suivis = ('table_id', 'date', 'time')
 
     class Meta:
         unique_together = ('table', 'date', 'time')  # empêche le double booking
+        indexes = [
+            # Historique d'un client (mes_reservations, mon_compte)
+            models.Index(fields=['user', '-date', '-time'], name='reservation_user_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} -> Table {self.table.number} le {self.date} à {self.time}"
@@ -89,7 +165,7 @@ class OrderItem(models.Model):
     def __str__(self):
         return f"{self.quantity} x {self.dish.name}"
 
-class Avis(models.Model):
+class Avis(SuiviChampsMixin, models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='avis')
     commentaire = models.TextField(verbose_name="Commentaire")
     note = models.IntegerField(
@@ -97,14 +173,91 @@ class Avis(models.Model):
         verbose_name="Note"
     )
     date_creation = models.DateTimeField(auto_now_add=True)
+    # Marqué par la commande moderer_avis (voir moderation.py)
+    suspect = models.BooleanField(default=False, verbose_name="Suspect")
+    # Entre dans la version des pages d'avis (voir pages.py), lue sur l'index
+    date_modification = models.DateTimeField(auto_now=True, db_index=True)
     
     class Meta:
         verbose_name = "Avis"
         verbose_name_plural = "Avis"
         ordering = ['-date_creation']
+        indexes = [
+            # Page des avis, paginée par curseur sur (date_creation, id)
+            models.Index(fields=['-date_creation', '-id'], name='avis_date_idx'),
+        ]
     
+    champs_suivis = ('note',)
+
     def __str__(self):
         return f"Avis de {self.user.username} - {self.note}/5"
+
+
+class StatistiquesAvis(models.Model):
+    """
+    Agrégat des avis (nombre, somme des notes, histogramme) sur une seule ligne,
+    tenu à jour par les signaux de Avis pour ne jamais parcourir la table.
+    """
+    nb_avis = models.PositiveIntegerField(default=0)
+    somme_notes = models.PositiveIntegerField(default=0)
+    note_1 = models.PositiveIntegerField(default=0)
+    note_2 = models.PositiveIntegerField(default=0)
+    note_3 = models.PositiveIntegerField(default=0)
+    note_4 = models.PositiveIntegerField(default=0)
+    note_5 = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Statistiques des avis"
+        verbose_name_plural = "Statistiques des avis"
+
+    def __str__(self):
+        return f"{self.nb_avis} avis - {self.moyenne}/5"
+
+    @property
+    def moyenne(self):
+        if not self.nb_avis:
+            return None
+        return round(self.somme_notes / self.nb_avis, 1)
+
+    @property
+    def histogramme(self):
+        """[(note, nombre, pourcentage), ...] de 5 à 1 étoile"""
+        return [
+            (note, getattr(self, f'note_{note}'),
+             round(100 * getattr(self, f'note_{note}') / self.nb_avis) if self.nb_avis else 0)
+            for note in range(5, 0, -1)
+        ]
+
+    @classmethod
+    def obtenir(cls):
+        stats = cls.objects.filter(pk=1).first()
+        return stats if stats is not None else cls.recalculer()
+
+    @classmethod
+    async def aobtenir(cls):
+        stats = await cls.objects.filter(pk=1).afirst()
+        return stats if stats is not None else await sync_to_async(cls.recalculer)()
+
+    @classmethod
+    def recalculer(cls):
+        """Reconstruit l'agrégat à partir de la table Avis"""
+        compteurs = dict(Avis.objects.order_by().values('note').annotate(n=models.Count('id')).values_list('note', 'n'))
+        valeurs = {f'note_{note}': compteurs.get(note, 0) for note in range(1, 6)}
+        valeurs['nb_avis'] = sum(compteurs.values())
+        valeurs['somme_notes'] = sum(note * n for note, n in compteurs.items())
+        stats, _ = cls.objects.update_or_create(pk=1, defaults=valeurs)
+        return stats
+
+    @classmethod
+    def ajuster(cls, note, sens):
+        """Ajoute (sens=1) ou retire (sens=-1) une note, par un UPDATE atomique"""
+        mis_a_jour = cls.objects.filter(pk=1).update(**{
+            'nb_avis': F('nb_avis') + sens,
+            'somme_notes': F('somme_notes') + sens * note,
+            f'note_{note}': F(f'note_{note}') + sens,
+        })
+        if not mis_a_jour:
+            cls.recalculer()
     
 
 class Categorie(models.Model):
@@ -115,6 +268,8 @@ class Categorie(models.Model):
     ]
     nom = models.CharField(max_length=100)
     type = models.CharField(max_length=20, choices=TYPES)
+    # Entre dans la version du menu (voir catalogue.py)
+    date_modification = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = "Catégorie"
@@ -131,18 +286,32 @@ class Plat(models.Model):
     categorie = models.ForeignKey(Categorie, on_delete=models.CASCADE, related_name='plats')
     
     image = models.ImageField(upload_to='plats/', blank=True, null=True)  # ✅ Remettre l'image
+    # Versions réduites de l'image (voir images.py)
+    image_empreinte = models.CharField(max_length=64, blank=True, editable=False)
+    image_largeur = models.PositiveIntegerField(null=True, blank=True, editable=False)
 
     disponible = models.BooleanField(default=True, verbose_name="Disponible")
+    # Entre dans la version du menu (voir catalogue.py) : les mises à jour
+    # en masse (update, bulk_update) doivent la renseigner elles-mêmes
+    date_modification = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = "Plat"
         verbose_name_plural = "Plats"
+        indexes = [
+            models.Index(fields=['categorie'], name='plat_disponible_idx', condition=models.Q(disponible=True)),
+        ]
     
     def __str__(self):
         return f"{self.nom} - {self.prix}€"
 
 
-class Commande(models.Model):
+# Commandes affichées sur l'écran cuisine (cuisine.py), seules couvertes
+# par l'index partiel commande_statut_date_idx
+STATUTS_A_SERVIR = ('en_attente', 'en_preparation')
+
+
+class Commande(SuiviChampsMixin, models.Model):
     STATUTS = [
         ('en_attente', 'En attente'),
         ('en_preparation', 'En préparation'),
@@ -159,34 +328,97 @@ class Commande(models.Model):
     
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='commandes')
     date_creation = models.DateTimeField(auto_now_add=True)
+    date_modification = models.DateTimeField(auto_now=True, db_index=True)
     statut = models.CharField(max_length=20, choices=STATUTS, default='en_attente')
     mode_paiement = models.CharField(max_length=20, choices=MODES_PAIEMENT)
     montant_total = models.DecimalField(max_digits=8, decimal_places=2)
     adresse_livraison = models.TextField(blank=True, null=True)
     telephone = models.CharField(max_length=20)
     points_gagnes = models.IntegerField(default=0)
+    # Posé par la tâche effets_commande_creee (signals.py), dans la transaction
+    # qui compte la commande : une suppression ne retire que ce qui a été compté
+    effets_appliques = models.BooleanField(default=False, editable=False)
+
+    champs_suivis = ('statut',)
 
     class Meta:
         verbose_name = "Commande"
         verbose_name_plural = "Commandes"
         ordering = ['-date_creation']
+        indexes = [
+            # Historique d'un client (mes_commandes, mon_compte)
+            models.Index(fields=['user', '-date_creation'], name='commande_user_date_idx'),
+            # Écran cuisine : index partiel, limité aux quelques commandes à servir.
+            # La requête (cuisine.a_servir) doit filtrer sur la même liste pour s'en servir.
+            models.Index(fields=['statut', '-date_creation'], name='commande_statut_date_idx',
+                         condition=models.Q(statut__in=STATUTS_A_SERVIR)),
+        ]
     
     def __str__(self):
         return f"Commande #{self.id} - {self.user.username} - {self.montant_total}€"
     
     def save(self, *args, **kwargs):
-        # Calcul des points : 1 point tous les 5 €
+        # Calcul des points : 1 point tous les 5 €. Ils ne sont crédités qu'à la
+        # création, par la tâche planifiée dans signals.py, jamais aux
+        # changements de statut.
         self.points_gagnes = int(self.montant_total // 5)
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # effets_appliques n'est écrit que par la tâche : une instance
+            # chargée avant son passage ne doit pas effacer la marque
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name != 'effets_appliques'
+            ]
         super().save(*args, **kwargs)
 
-        # Ajouter les points au profil de l'utilisateur
-        profile = self.user.profile
-        profile.points += self.points_gagnes
-        profile.save()
-    
     
 
 
+class PointsLedger(models.Model):
+    """
+    Journal des points fidélité : une ligne par mouvement, jamais modifiée.
+    Profile.points en est le solde, tenu à jour par des UPDATE atomiques
+    et recalculé périodiquement par la commande `cumuler_points`.
+    """
+    MOTIFS = [
+        ('solde_initial', 'Solde initial'),
+        ('commande', 'Commande'),
+        ('ajustement', 'Ajustement'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='mouvements_points')
+    commande = models.ForeignKey(
+        Commande, on_delete=models.SET_NULL, null=True, blank=True, related_name='mouvements_points'
+    )
+    points = models.IntegerField()
+    motif = models.CharField(max_length=20, choices=MOTIFS)
+    date_creation = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Mouvement de points"
+        verbose_name_plural = "Mouvements de points"
+        ordering = ['-date_creation']
+
+    def __str__(self):
+        return f"{self.user.username} : {self.points:+d} points ({self.get_motif_display()})"
+
+    @classmethod
+    def enregistrer(cls, user, points, motif, commande=None):
+        """
+        Ajoute un mouvement et met à jour le solde du profil sans lecture préalable
+        (UPDATE ... SET points = points + n), dans la même transaction.
+        """
+        with transaction.atomic(savepoint=False):
+            mouvement = cls.objects.create(user=user, commande=commande, points=points, motif=motif)
+            Profile.objects.filter(user=user).update(points=F('points') + points)
+
+        # Le profil éventuellement déjà chargé reflète le nouveau solde
+        profile = user._state.fields_cache.get('profile')
+        if profile is not None:
+            profile.refresh_from_db(fields=['points'])
+        return mouvement
+
+
 class LigneCommande(models.Model):
     commande = models.ForeignKey(Commande, on_delete=models.CASCADE, related_name='lignes')
     plat = models.ForeignKey(Plat, on_delete=models.CASCADE)
@@ -206,7 +438,120 @@ class LigneCommande(models.Model):
     
 
 
-class EmployeInfo(models.Model):
+class StatistiquesClient(models.Model):
+    """
+    Compteurs dénormalisés d'un client, mis à jour par les signaux à chaque écriture
+    pour que le tableau de bord n'ait rien à compter.
+    Les dépenses excluent les commandes annulées.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='statistiques')
+    nb_commandes = models.PositiveIntegerField(default=0)
+    depenses_totales = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    nb_reservations = models.PositiveIntegerField(default=0)
+    nb_avis = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Statistiques client"
+        verbose_name_plural = "Statistiques clients"
+
+    def __str__(self):
+        return f"{self.user.username} - {self.nb_commandes} commandes"
+
+    @classmethod
+    def obtenir(cls, user):
+        stats = cls.objects.filter(user=user).first()
+        return stats if stats is not None else cls.recalculer(user)
+
+    @classmethod
+    async def aobtenir(cls, user):
+        stats = await cls.objects.filter(user=user).afirst()
+        return stats if stats is not None else await sync_to_async(cls.recalculer)(user)
+
+    @classmethod
+    def recalculer(cls, user):
+        """
+        Reconstruit les compteurs d'un client à partir des tables sources.
+        Les commandes dont la tâche de création n'est pas encore passée sont
+        laissées de côté : elle les ajoutera elle-même.
+        """
+        en_attente = Tache.en_attente(COMMANDE_CREEE, 'commande_id')
+        commandes = Commande.objects.filter(user=user).exclude(pk__in=en_attente).aggregate(
+            nb=models.Count('id'),
+            depenses=models.Sum('montant_total', filter=~models.Q(statut='annulee')),
+        )
+        stats, _ = cls.objects.update_or_create(user=user, defaults={
+            'nb_commandes': commandes['nb'],
+            'depenses_totales': commandes['depenses'] or 0,
+            'nb_reservations': Reservation.objects.filter(user=user).count(),
+            'nb_avis': Avis.objects.filter(user=user).count(),
+        })
+        return stats
+
+    @classmethod
+    def ajuster(cls, user_id, **deltas):
+        """
+        Applique des variations (ex. nb_commandes=1) par un UPDATE atomique.
+        Sans ligne existante on ne fait rien : obtenir() la recalculera.
+        """
+        cls.objects.filter(user_id=user_id).update(**{
+            champ: F(champ) + delta for champ, delta in deltas.items()
+        })
+
+
+# ======================== VENTES (AGRÉGATS) ========================
+class Ventes(models.Model):
+    """
+    Agrégat des ventes d'une période pour le total, une catégorie ou un plat.
+    Les commandes annulées n'y figurent pas. Tenu à jour par ventes.py ;
+    objet_id n'est pas une clé étrangère pour garder l'historique d'un plat
+    supprimé.
+    """
+    DIMENSIONS = [
+        ('total', 'Total'),
+        ('categorie', 'Catégorie'),
+        ('plat', 'Plat'),
+    ]
+
+    dimension = models.CharField(max_length=10, choices=DIMENSIONS)
+    objet_id = models.PositiveIntegerField(default=0)  # 0 pour le total
+    chiffre_affaires = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    nb_commandes = models.IntegerField(default=0)
+    quantite = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class VentesJour(Ventes):
+    jour = models.DateField()
+
+    class Meta:
+        verbose_name = "Ventes du jour"
+        verbose_name_plural = "Ventes par jour"
+        constraints = [
+            models.UniqueConstraint(fields=['jour', 'dimension', 'objet_id'], name='ventes_jour_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.jour} - {self.dimension} {self.objet_id} : {self.chiffre_affaires}€"
+
+
+class VentesHeure(Ventes):
+    jour = models.DateField()
+    heure = models.PositiveSmallIntegerField()  # heure locale, 0 à 23
+
+    class Meta:
+        verbose_name = "Ventes de l'heure"
+        verbose_name_plural = "Ventes par heure"
+        constraints = [
+            models.UniqueConstraint(fields=['jour', 'heure', 'dimension', 'objet_id'], name='ventes_heure_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.jour} {self.heure}h - {self.dimension} {self.objet_id} : {self.chiffre_affaires}€"
+
+
+class EmployeInfo(SauvegardePartielleMixin, models.Model):
     """
     Informations supplémentaires pour les employés du restaurant
     """
@@ -268,9 +613,60 @@ class EmployeInfo(models.Model):
         return self.anciennete_jours // 365
 
 
-# Signal pour créer automatiquement EmployeInfo quand le profil est employé
-@receiver(post_save, sender=Profile)
-def create_employe_info(sender, instance, created, **kwargs):
-    """Crée automatiquement les infos employé si le rôle est 'employe'"""
-    if instance.role == 'employe' and not hasattr(instance, 'employe_info'):
-        EmployeInfo.objects.get_or_create(profile=instance)
\ No newline at end of file
+# Tâche des effets d'une nouvelle commande (points, compteurs, ventes),
+# planifiée et exécutée par signals.py
+COMMANDE_CREEE = 'commande_creee'
+
+
+class Tache(models.Model):
+    """
+    Travail différé, enregistré dans la transaction qui le demande et exécuté
+    hors requête par `manage.py run_worker` (voir taches.py).
+    """
+    A_FAIRE = 'a_faire'
+    EN_COURS = 'en_cours'
+    TERMINEE = 'terminee'
+    ECHOUEE = 'echouee'
+    STATUTS = [
+        (A_FAIRE, 'À faire'),
+        (EN_COURS, 'En cours'),
+        (TERMINEE, 'Terminée'),
+        (ECHOUEE, 'Échouée'),
+    ]
+
+    nom = models.CharField(max_length=100)
+    arguments = models.JSONField(default=dict, blank=True)
+    statut = models.CharField(max_length=20, choices=STATUTS, default=A_FAIRE)
+    executer_apres = models.DateTimeField(default=timezone.now)
+    tentatives = models.PositiveSmallIntegerField(default=0)
+    tentatives_max = models.PositiveSmallIntegerField(default=5)
+    # Réservation par un worker : au-delà de reservee_jusqu_a, la tâche est reprise
+    jeton = models.CharField(max_length=32, blank=True)
+    reservee_jusqu_a = models.DateTimeField(null=True, blank=True)
+    derniere_erreur = models.TextField(blank=True)
+    date_creation = models.DateTimeField(auto_now_add=True)
+    date_fin = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Tâche"
+        verbose_name_plural = "Tâches"
+        indexes = [
+            # File d'attente : tâches à faire par date d'exécution
+            models.Index(fields=['statut', 'executer_apres'], name='tache_file_idx'),
+            models.Index(fields=['jeton'], name='tache_jeton_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.nom} #{self.pk} ({self.get_statut_display()})"
+
+    @classmethod
+    def en_attente(cls, nom, argument):
+        """
+        Valeurs (entières) de `argument` pour les tâches `nom` à faire ou en cours.
+
+        Renvoie une sous-requête, à passer à `__in` : la liste n'est jamais
+        chargée, quelle que soit la taille de la file.
+        """
+        return cls.objects.filter(nom=nom, statut__in=(cls.A_FAIRE, cls.EN_COURS)).annotate(
+            valeur=Cast(KeyTextTransform(argument, 'arguments'), models.IntegerField())
+        ).values('valeur')
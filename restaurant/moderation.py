@@ -0,0 +1,95 @@
+# restaurant/moderation.py
+"""
+Contrôle de la qualité du texte des avis.
+
+Toutes les mesures (voyelles, consonnes, plus longue suite de consonnes,
+répétitions, présence d'un espace) sont prises en un seul parcours du texte,
+puis les règles sont appliquées dans le même ordre que l'ancien validateur
+de AvisForm, avec les mêmes messages.
+"""
+from collections import namedtuple
+
+VOYELLES = frozenset("aeiouyàâéèêëîïôöûü")
+CONSONNES = frozenset("bcdfghjklmnpqrstvwxyz")
+
+LONGUEUR_MIN = 5
+LONGUEUR_MOT_MAX = 6  # au-delà, un texte sans espace est suspect
+SUITE_CONSONNES_MAX = 3
+REPETITION_MAX = 3  # un même caractère 4 fois d'affilée est refusé
+RATIO_MAX = 4  # consonnes / voyelles
+
+MESSAGES = {
+    'trop_court': "Votre avis est trop court.",
+    'sans_voyelle': "Votre avis doit contenir des mots compréhensibles.",
+    'suite_consonnes': "Votre avis semble contenir des séquences non naturelles.",
+    'mot_unique': "Votre avis doit être une phrase ou plusieurs mots.",
+    'repetition': "Votre avis ne doit pas contenir de répétitions anormales.",
+    'ratio': "Votre avis ne semble pas être un texte compréhensible.",
+}
+
+class Verdict(namedtuple('Verdict', [
+    'accepte', 'motif', 'voyelles', 'consonnes', 'suite_consonnes', 'repetition',
+])):
+    __slots__ = ()
+
+    @property
+    def message(self):
+        return MESSAGES.get(self.motif)
+
+
+def normaliser(texte):
+    return (texte or '').strip().lower()
+
+
+def evaluer(texte):
+    """
+    Évalue un commentaire (déjà normalisé ou non) et renvoie un Verdict :
+    accepte, motif du refus (clé de MESSAGES ou None) et les mesures prises.
+    """
+    texte = normaliser(texte)
+
+    voyelles = consonnes = 0
+    suite = suite_max = 0
+    repetition = repetition_max = 0
+    precedent = None
+    espace = False
+
+    for caractere in texte:
+        if caractere in VOYELLES:
+            voyelles += 1
+            suite = 0
+        elif caractere in CONSONNES:
+            consonnes += 1
+            suite += 1
+            if suite > suite_max:
+                suite_max = suite
+        else:
+            suite = 0
+            if caractere == ' ':
+                espace = True
+
+        # Comme le « . » d'une regex, un retour à la ligne n'est pas une répétition
+        if caractere == precedent and caractere != '\n':
+            repetition += 1
+            if repetition > repetition_max:
+                repetition_max = repetition
+        else:
+            repetition = 1
+        precedent = caractere
+
+    if len(texte) < LONGUEUR_MIN:
+        motif = 'trop_court'
+    elif not voyelles:
+        motif = 'sans_voyelle'
+    elif suite_max > SUITE_CONSONNES_MAX:
+        motif = 'suite_consonnes'
+    elif not espace and len(texte) > LONGUEUR_MOT_MAX:
+        motif = 'mot_unique'
+    elif repetition_max > REPETITION_MAX:
+        motif = 'repetition'
+    elif consonnes / voyelles > RATIO_MAX:
+        motif = 'ratio'
+    else:
+        motif = None
+
+    return Verdict(motif is None, motif, voyelles, consonnes, suite_max, repetition_max)
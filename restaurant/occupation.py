@@ -0,0 +1,197 @@
+# restaurant/occupation.py
+"""
+Grille d'occupation des tables, jour par jour.
+
+Pour une date donnée, la grille associe à chaque table réservée un entier dont
+le bit i vaut 1 si le créneau i est pris. Les créneaux couvrent les horaires
+acceptés par ReservationForm (12h - 22h) par pas de DUREE_CRENEAU minutes.
+Les tables absentes de la grille sont libres toute la journée.
+
+Une grille est construite en une requête sur Reservation, mise en cache, puis
+tenue à jour par les signaux de Reservation (voir signals.py). Ce n'est
+qu'une indication : le cache peut être propre au processus, et sa mise à
+jour n'est pas atomique. Avant d'enregistrer, services.placer_reservation()
+revérifie le créneau en base (creneau_occupe), table verrouillée.
+
+attribuer_table() place un groupe sur la plus petite table libre qui
+l'accueille (best fit) : les grandes tables restent aux grands groupes au
+lieu d'être prises par des couples, ce qui assoit plus de couverts par
+service (voir `manage.py benchmark_tables`).
+"""
+from datetime import time, timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Reservation, Table
+
+OUVERTURE = time(12, 0)
+FERMETURE = time(22, 0)
+DUREE_CRENEAU = 30  # minutes
+DUREE_CACHE = 60 * 60  # secondes
+
+_DEBUT = OUVERTURE.hour * 60 + OUVERTURE.minute
+_FIN = FERMETURE.hour * 60 + FERMETURE.minute
+
+CRENEAUX = [
+    time(minutes // 60, minutes % 60)
+    for minutes in range(_DEBUT, _FIN + 1, DUREE_CRENEAU)
+]
+
+CLE_TABLES = 'occupation:tables'
+
+
+def _cle(jour):
+    return f'occupation:{jour.isoformat()}'
+
+
+def indice_creneau(heure):
+    """Indice du créneau contenant `heure`, ou None en dehors des horaires."""
+    minutes = heure.hour * 60 + heure.minute
+    if minutes < _DEBUT or minutes > _FIN:
+        return None
+    return (minutes - _DEBUT) // DUREE_CRENEAU
+
+
+def lister_tables():
+    """Tables du restaurant [(id, number, seats), ...], mises en cache."""
+    tables = cache.get(CLE_TABLES)
+    if tables is None:
+        tables = list(Table.objects.order_by('number').values_list('id', 'number', 'seats'))
+        cache.set(CLE_TABLES, tables, DUREE_CACHE)
+    return tables
+
+
+def invalider_tables():
+    cache.delete(CLE_TABLES)
+
+
+def _construire(jours):
+    """Construit les grilles de plusieurs jours en une seule requête."""
+    grilles = {jour: {} for jour in jours}
+    reservations = Reservation.objects.filter(date__in=jours).values_list('table_id', 'date', 'time')
+    for table_id, jour, heure in reservations:
+        indice = indice_creneau(heure)
+        if indice is not None:
+            grilles[jour][table_id] = grilles[jour].get(table_id, 0) | (1 << indice)
+    return grilles
+
+
+def grilles(debut, fin):
+    """
+    Grilles d'occupation {date: {table_id: masque}} de `debut` à `fin` inclus.
+
+    Les jours déjà en cache ne coûtent rien ; les autres sont construits
+    ensemble en une requête.
+    """
+    jours = [debut + timedelta(days=i) for i in range((fin - debut).days + 1)]
+    en_cache = cache.get_many([_cle(jour) for jour in jours])
+
+    resultat = {}
+    manquants = []
+    for jour in jours:
+        grille = en_cache.get(_cle(jour))
+        if grille is None:
+            manquants.append(jour)
+        else:
+            resultat[jour] = grille
+
+    if manquants:
+        nouvelles = _construire(manquants)
+        cache.set_many({_cle(jour): grille for jour, grille in nouvelles.items()}, DUREE_CACHE)
+        resultat.update(nouvelles)
+
+    return resultat
+
+
+def grille_du_jour(jour):
+    return grilles(jour, jour)[jour]
+
+
+def tables_libres(grille, tables=None):
+    """
+    Pour une grille, renvoie {créneau 'HH:MM': [id des tables libres]}.
+    """
+    if tables is None:
+        tables = lister_tables()
+    libres = {}
+    for indice, creneau in enumerate(CRENEAUX):
+        bit = 1 << indice
+        libres[creneau.strftime('%H:%M')] = [
+            table_id for table_id, _, _ in tables
+            if not grille.get(table_id, 0) & bit
+        ]
+    return libres
+
+
+def choisir_table(grille, tables, indice, nb_personnes, exclues=()):
+    """
+    Plus petite table libre au créneau `indice` qui accueille `nb_personnes`,
+    la plus petite numérotation à places égales. Renvoie son id, ou None.
+    """
+    bit = 1 << indice
+    candidates = [
+        (seats, number, table_id)
+        for table_id, number, seats in tables
+        if seats >= nb_personnes and not grille.get(table_id, 0) & bit and table_id not in exclues
+    ]
+    return min(candidates)[2] if candidates else None
+
+
+def attribuer_table(jour, heure, nb_personnes, exclues=()):
+    """
+    Table à réserver pour `nb_personnes` le `jour` à `heure`, ou None si
+    aucune ne convient. Seule la grille du jour peut coûter une requête,
+    les tables sont en cache.
+    """
+    indice = indice_creneau(heure)
+    if indice is None:
+        return None
+    return choisir_table(grille_du_jour(jour), lister_tables(), indice, nb_personnes, exclues)
+
+
+def oublier(jour):
+    """Abandonne la grille en cache d'un jour : elle sera relue en base."""
+    cache.delete(_cle(jour))
+
+
+def creneau_occupe(table_id, jour, indice):
+    """Vrai si une réservation de la table tombe dans le créneau `indice`, lu en base."""
+    debut = _DEBUT + indice * DUREE_CRENEAU
+    fin = min(debut + DUREE_CRENEAU - 1, 23 * 60 + 59)
+    return Reservation.objects.filter(
+        table_id=table_id,
+        date=jour,
+        time__range=(time(debut // 60, debut % 60), time(fin // 60, fin % 60, 59)),
+    ).exists()
+
+
+def _modifier(table_id, jour, heure, occupe):
+    indice = indice_creneau(heure)
+    if indice is None:
+        return
+    cle = _cle(jour)
+    grille = cache.get(cle)
+    if grille is None:
+        # Pas encore construite : elle le sera à la prochaine lecture
+        return
+    masque = grille.get(table_id, 0)
+    if occupe:
+        masque |= 1 << indice
+    elif not creneau_occupe(table_id, jour, indice):
+        masque &= ~(1 << indice)
+    if masque:
+        grille[table_id] = masque
+    else:
+        grille.pop(table_id, None)
+    cache.set(cle, grille, DUREE_CACHE)
+
+
+def marquer(table_id, jour, heure):
+    """Marque un créneau comme pris, une fois la transaction validée."""
+    transaction.on_commit(lambda: _modifier(table_id, jour, heure, True))
+
+
+def liberer(table_id, jour, heure):
+    """Libère un créneau, une fois la transaction validée."""
+    transaction.on_commit(lambda: _modifier(table_id, jour, heure, False))
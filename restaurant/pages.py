@@ -0,0 +1,254 @@
+# restaurant/pages.py
+"""
+Cache des pages publiques pour les visiteurs non connectés.
+
+Une vue décorée par @cache_anonyme(duree, dependances) est rendue une fois
+puis resservie depuis le cache à tous les visiteurs anonymes, pour la même
+URL (chaîne de requête comprise). La réponse n'est ni lue ni écrite dans le
+cache pour :
+  - un utilisateur connecté (la page affiche son nom ; NoCacheMiddleware
+    interdit alors tout cache côté navigateur),
+  - une requête autre que GET ou HEAD,
+  - un visiteur qui a des messages flash en attente (ils doivent s'afficher
+    une fois, sur sa page à lui),
+  - une réponse autre que 200, qui pose un cookie ou qui contient un jeton CSRF.
+
+Comme pour l'instantané du menu (catalogue.py), la clé contient la version
+de chaque dépendance, calculée en base (ETATS) et gardée en cache
+catalogue.VERIFICATION secondes. Une modification rend les pages qui en
+dépendent introuvables, elles expirent d'elles-mêmes : aussitôt dans le
+processus qui l'enregistre (invalider('avis') efface la version gardée),
+au plus VERIFICATION secondes plus tard dans les autres si le cache n'est
+pas partagé. La page mise en cache est rendue sur la base principale, comme
+sa version, même si la vue autorise la réplique (@lecture_replica).
+
+Les fonctions etag_* servent de validateurs au décorateur condition() de
+Django : elles résument en une empreinte, sans rendre le template, tout ce
+dont dépend la page (versions des données, identité du visiteur). Si le
+navigateur présente la même empreinte (If-None-Match), la vue répond 304
+sans rien calculer d'autre.
+"""
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib import messages
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max, Subquery
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
+
+from . import catalogue
+from .models import Avis, Commande, StatistiquesAvis
+from .routers import ALIAS_PRINCIPAL, lecture_principale
+
+DUREE_DEFAUT = 5 * 60  # secondes
+METHODES = ('GET', 'HEAD')
+
+
+# État en base des dépendances des pages, hors menu (voir catalogue.py).
+# Pour les avis : le nombre et la somme des notes tenus par StatistiquesAvis
+# suivent créations, suppressions et notes sans compter la table, la
+# dernière date de modification suit les commentaires.
+ETATS = {
+    'avis': StatistiquesAvis.objects.filter(pk=1).values_list(
+        'nb_avis', 'somme_notes',
+        Subquery(Avis.objects.order_by('-date_modification').values('date_modification')[:1]),
+    ),
+}
+
+
+def _cle_version(nom):
+    return f'pages:version:{nom}'
+
+
+def _empreinte(etat):
+    return hashlib.md5(repr(etat).encode()).hexdigest()
+
+
+def version(nom):
+    """Version courante des pages qui dépendent de `nom`."""
+    if nom == 'menu':
+        # Même version que l'instantané du menu
+        return catalogue.version_menu()
+    valeur = cache.get(_cle_version(nom))
+    if valeur is None:
+        valeur = _empreinte(list(ETATS[nom].using(ALIAS_PRINCIPAL)))
+        cache.set(_cle_version(nom), valeur, catalogue.VERIFICATION)
+    return valeur
+
+
+async def aversion(nom):
+    """version() pour les vues asynchrones (cache.aget, aaggregate)."""
+    if nom == 'menu':
+        return await catalogue.aversion_menu()
+    valeur = await cache.aget(_cle_version(nom))
+    if valeur is None:
+        valeur = _empreinte([ligne async for ligne in ETATS[nom].using(ALIAS_PRINCIPAL)])
+        await cache.aset(_cle_version(nom), valeur, catalogue.VERIFICATION)
+    return valeur
+
+
+def invalider(nom):
+    """Fait relire la version de `nom` en base, une fois la transaction validée."""
+    transaction.on_commit(lambda: cache.delete(_cle_version(nom)))
+
+
+def _cle(request, versions):
+    chemin = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'pages:{request.method}:{chemin}:{versions}'
+
+
+def cle_page(request, dependances):
+    return _cle(request, '.'.join(f'{nom}{version(nom)}' for nom in dependances))
+
+
+async def acle_page(request, dependances):
+    return _cle(request, '.'.join([f'{nom}{await aversion(nom)}' for nom in dependances]))
+
+
+def cacheable(request):
+    return (
+        request.method in METHODES
+        and not request.user.is_authenticated
+        # len() ne marque pas les messages comme lus
+        and not len(messages.get_messages(request))
+    )
+
+
+def a_garder(request, response):
+    # La page varie selon la session : un cache partagé ne doit pas
+    # servir la version anonyme à un utilisateur connecté
+    patch_vary_headers(response, ('Cookie',))
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+    )
+
+
+def cache_anonyme(duree=DUREE_DEFAUT, dependances=()):
+    """Met en cache la page rendue pour les visiteurs anonymes (voir plus haut)."""
+    def decorateur(vue):
+        if iscoroutinefunction(vue):
+            @wraps(vue)
+            async def awrap(request, *args, **kwargs):
+                if not cacheable(request):
+                    return await vue(request, *args, **kwargs)
+
+                cle = await acle_page(request, dependances)
+                response = await cache.aget(cle)
+                if response is None:
+                    with lecture_principale():
+                        response = await vue(request, *args, **kwargs)
+                    if a_garder(request, response):
+                        await cache.aset(cle, response, duree)
+                return response
+
+            return awrap
+
+        @wraps(vue)
+        def wrap(request, *args, **kwargs):
+            if not cacheable(request):
+                return vue(request, *args, **kwargs)
+
+            cle = cle_page(request, dependances)
+            response = cache.get(cle)
+            if response is None:
+                with lecture_principale():
+                    response = vue(request, *args, **kwargs)
+                if a_garder(request, response):
+                    cache.set(cle, response, duree)
+            return response
+
+        return wrap
+
+    return decorateur
+
+
+# ============================================
+# VALIDATEURS (ETag)
+# ============================================
+
+def _etag(request, *versions):
+    """
+    Empreinte de la page pour ce visiteur, ou None (pas de validateur) s'il
+    a des messages flash à voir.
+    """
+    if len(messages.get_messages(request)):
+        return None
+    user = request.user
+    if user.is_authenticated:
+        # Le secret CSRF change à la connexion : une page gardée avec le jeton
+        # de formulaire d'une session précédente n'est pas revalidée.
+        # get_token() le crée dès maintenant s'il manque, comme le fera le rendu.
+        get_token(request)
+        identite = (
+            user.pk, user.get_username(), getattr(request, 'role', None), user.is_superuser,
+            request.META['CSRF_COOKIE'],
+        )
+    else:
+        identite = None
+    return hashlib.md5(repr((identite, versions)).encode()).hexdigest()
+
+
+def etag_menu(request, *args, **kwargs):
+    return _etag(request, 'menu', version('menu'))
+
+
+def etag_avis(request, *args, **kwargs):
+    return _etag(request, 'avis', version('avis'))
+
+
+async def aetag_menu(request, *args, **kwargs):
+    return _etag(request, 'menu', await aversion('menu'))
+
+
+async def aetag_avis(request, *args, **kwargs):
+    return _etag(request, 'avis', await aversion('avis'))
+
+
+def etag_commandes(request, *args, **kwargs):
+    """
+    Lu en base plutôt qu'en cache : un changement de statut doit se voir
+    quel que soit le processus qui l'a enregistré. date_modification suit
+    les changements de statut, le nombre de commandes les suppressions.
+    """
+    etat = Commande.objects.filter(user=request.user).aggregate(
+        nombre=Count('id'), modification=Max('date_modification'),
+    )
+    return _etag(request, 'commandes', etat['nombre'], etat['modification'], version('menu'))
+
+
+async def aetag_commandes(request, *args, **kwargs):
+    """Variante de etag_commandes pour les vues asynchrones (views_async.py)."""
+    etat = await Commande.objects.filter(user=request.user).aaggregate(
+        nombre=Count('id'), modification=Max('date_modification'),
+    )
+    return _etag(request, 'commandes', etat['nombre'], etat['modification'], await aversion('menu'))
+
+
+def condition_asynchrone(etag_func):
+    """
+    condition(etag_func=...) pour une vue asynchrone dont le validateur est
+    lui-même asynchrone (lecture de la base ou du cache) : condition() de
+    Django appelle le validateur de façon synchrone.
+    """
+    def decorateur(vue):
+        @wraps(vue)
+        async def wrap(request, *args, **kwargs):
+            etag = await etag_func(request, *args, **kwargs)
+            etag = quote_etag(etag) if etag else None
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = await vue(request, *args, **kwargs)
+            if etag and request.method in METHODES:
+                response.headers.setdefault('ETag', etag)
+            return response
+
+        return wrap
+
+    return decorateur
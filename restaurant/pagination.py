@@ -0,0 +1,39 @@
+# restaurant/pagination.py
+"""
+Pagination par curseur (keyset) sur un couple (date, id).
+
+Contrairement à OFFSET, le coût d'une page ne dépend pas de sa position :
+la base reprend directement après la dernière ligne vue.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import Q
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encoder_curseur(date, pk):
+    microsecondes = (date - _EPOCH) // timedelta(microseconds=1)
+    return f'{microsecondes}_{pk}'
+
+
+def decoder_curseur(curseur):
+    """Renvoie (date, pk) ; lève ValueError si le curseur est invalide."""
+    microsecondes, pk = curseur.split('_')
+    try:
+        date = _EPOCH + timedelta(microseconds=int(microsecondes))
+    except OverflowError:
+        raise ValueError(f"Date hors limites dans le curseur : {microsecondes}")
+    return date, int(pk)
+
+
+def apres(champ, curseur):
+    """Filtre des lignes strictement après `curseur` dans l'ordre (champ, pk) croissant."""
+    date, pk = curseur
+    return Q(**{f'{champ}__gt': date}) | Q(**{champ: date, 'pk__gt': pk})
+
+
+def avant(champ, curseur):
+    """Filtre des lignes strictement avant `curseur` dans l'ordre (champ, pk) croissant."""
+    date, pk = curseur
+    return Q(**{f'{champ}__lt': date}) | Q(**{champ: date, 'pk__lt': pk})
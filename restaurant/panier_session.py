@@ -0,0 +1,146 @@
+# restaurant/panier_session.py
+"""
+Panier tenu côté serveur, dans la session du client.
+
+La session ne garde que l'essentiel :
+    {'articles': {'<plat_id>': quantite}, 'empreinte': '...'}
+Noms et prix sont relus dans l'instantané du menu (catalogue.py) à chaque
+affichage, sans requête.
+
+L'empreinte résume les prix des plats du panier tels que le client les a vus
+lors de sa dernière modification. À la validation, passer_commande() la
+recalcule sur les plats qu'elle charge de toute façon (une seule requête) :
+si un prix a changé entre-temps, la commande est refusée au lieu d'être
+facturée à un prix que le client n'a pas vu.
+
+L'instantané peut retarder sur la base de quelques secondes (version du menu
+gardée en cache, voir catalogue.py). Après un refus, la version est donc
+relue en base avant de réenregistrer le panier : le client voit alors les
+prix que la validation suivante vérifiera, et elle passe.
+
+Une empreinte plutôt que le numéro de version du menu : un plat modifié
+ailleurs sur la carte n'invalide pas le panier.
+"""
+from decimal import Decimal
+
+from . import catalogue
+from .services import PanierInvalide, PrixPerimes, empreinte_prix, passer_commande
+
+CLE_SESSION = 'panier'
+QUANTITE_MAX = 99
+
+
+def contenu(request):
+    """{plat_id: quantite} du panier de la session."""
+    articles = request.session.get(CLE_SESSION, {}).get('articles', {})
+    return {int(plat_id): quantite for plat_id, quantite in articles.items()}
+
+
+def resume(request):
+    """
+    Le panier tel qu'affiché : lignes avec nom et prix de l'instantané,
+    total et nombre d'articles. Les montants sont des chaînes (JSON).
+    """
+    quantites = contenu(request)
+    lignes = []
+    total = Decimal('0.00')
+    if quantites:
+        plats = catalogue.instantane()['plats']
+        for plat_id, quantite in quantites.items():
+            plat = plats.get(plat_id)
+            if plat is None:
+                continue
+            sous_total = plat['prix'] * quantite
+            total += sous_total
+            lignes.append({
+                'id': plat_id,
+                'nom': plat['nom'],
+                'prix': str(plat['prix']),
+                'quantite': quantite,
+                'sous_total': str(sous_total),
+                'disponible': plat['disponible'],
+            })
+    return {
+        'articles': lignes,
+        'total': str(total),
+        'nombre': sum(ligne['quantite'] for ligne in lignes),
+    }
+
+
+def _enregistrer(request, quantites):
+    plats = catalogue.instantane()['plats'] if quantites else {}
+    # Plats supprimés de la carte depuis leur ajout : retirés du panier
+    quantites = {plat_id: quantite for plat_id, quantite in quantites.items() if plat_id in plats}
+    request.session[CLE_SESSION] = {
+        'articles': {str(plat_id): quantite for plat_id, quantite in quantites.items()},
+        'empreinte': empreinte_prix({plat_id: plats[plat_id]['prix'] for plat_id in quantites}),
+    }
+    return resume(request)
+
+
+def _identifiant(plat_id):
+    try:
+        return int(plat_id)
+    except (TypeError, ValueError):
+        raise PanierInvalide("Plat inconnu.")
+
+
+def _plat_disponible(plat_id):
+    plat_id = _identifiant(plat_id)
+    plat = catalogue.instantane()['plats'].get(plat_id)
+    if plat is None or not plat['disponible']:
+        raise PanierInvalide("Ce plat n'est pas disponible.")
+    return plat_id
+
+
+def _quantite(quantite):
+    try:
+        quantite = int(quantite)
+    except (TypeError, ValueError):
+        raise PanierInvalide("Quantité invalide.")
+    if quantite < 0:
+        raise PanierInvalide("Les quantités doivent être positives.")
+    return quantite
+
+
+def modifier(request, plat_id, quantite):
+    """Fixe la quantité d'un plat (0 le retire). Renvoie le résumé du panier."""
+    quantite = _quantite(quantite)
+    quantites = contenu(request)
+    if quantite:
+        quantites[_plat_disponible(plat_id)] = min(quantite, QUANTITE_MAX)
+    else:
+        quantites.pop(_identifiant(plat_id), None)
+    return _enregistrer(request, quantites)
+
+
+def ajouter(request, plat_id, quantite=1):
+    """Ajoute `quantite` exemplaires d'un plat. Renvoie le résumé du panier."""
+    plat_id = _plat_disponible(plat_id)
+    return modifier(request, plat_id, contenu(request).get(plat_id, 0) + _quantite(quantite))
+
+
+def retirer(request, plat_id):
+    return modifier(request, plat_id, 0)
+
+
+def vider(request):
+    request.session.pop(CLE_SESSION, None)
+
+
+def commander(request, **coordonnees):
+    """
+    Crée la commande à partir du panier de la session, puis le vide.
+    Lève PrixPerimes si un prix a changé depuis la dernière modification.
+    """
+    empreinte = request.session.get(CLE_SESSION, {}).get('empreinte')
+    try:
+        commande = passer_commande(request.user, contenu(request), empreinte=empreinte, **coordonnees)
+    except PrixPerimes:
+        # Instantané relu d'après la base : le panier affiché et son empreinte
+        # portent les prix que la tentative suivante vérifiera
+        catalogue.oublier_version()
+        _enregistrer(request, contenu(request))
+        raise
+    vider(request)
+    return commande
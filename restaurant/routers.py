@@ -0,0 +1,142 @@
+# restaurant/routers.py
+"""
+Routage des lectures vers une réplique (alias 'replica' de DATABASES).
+
+Par défaut tout passe par la base principale. Une vue ne lit sur la réplique
+que si elle l'autorise explicitement (décorateur @lecture_replica) et
+seulement pour les méthodes sûres (GET, HEAD). Même dans une telle vue, la
+base principale est utilisée :
+  - dès que la requête a écrit quelque chose (on relit ses propres écritures),
+  - dans une transaction,
+  - pendant settings.REPLICA_FENETRE_STICKY secondes après une requête qui a
+    écrit : le navigateur garde alors le cookie COOKIE_STICKY (voir
+    LectureReplicaMiddleware), le temps que la réplique rattrape son retard.
+
+Hors requête (commandes, tâches), aucune lecture ne va sur la réplique, ni
+dans un bloc lecture_principale().
+"""
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+ALIAS_PRINCIPAL = 'default'
+ALIAS_REPLICA = 'replica'
+COOKIE_STICKY = 'lecture_principale'
+METHODES_SURES = ('GET', 'HEAD')
+
+_etat = contextvars.ContextVar('lecture_replica', default=None)
+
+
+def fenetre_sticky():
+    return getattr(settings, 'REPLICA_FENETRE_STICKY', 10)
+
+
+def replica_disponible():
+    return ALIAS_REPLICA in connections.databases
+
+
+class EtatLecture:
+    """Politique de lecture de la requête en cours."""
+
+    def __init__(self, sticky=False):
+        self.sticky = sticky
+        self.replica_autorise = False
+        self.ecriture = False
+        # Voir lecture_principale()
+        self.principale = False
+
+    @property
+    def alias(self):
+        if self.replica_autorise and not self.sticky and not self.ecriture and not self.principale:
+            return ALIAS_REPLICA
+        return ALIAS_PRINCIPAL
+
+
+def ouvrir(sticky=False):
+    """Démarre le suivi d'une requête ; renvoie (état, jeton pour fermer())."""
+    etat = EtatLecture(sticky)
+    return etat, _etat.set(etat)
+
+
+def fermer(jeton):
+    _etat.reset(jeton)
+
+
+def lecture_replica(vue):
+    """
+    Autorise la vue à lire sur la réplique (GET et HEAD seulement).
+    À réserver aux pages qui tolèrent quelques secondes de retard.
+    """
+    def autoriser(request):
+        etat = _etat.get()
+        if etat is not None and request.method in METHODES_SURES:
+            etat.replica_autorise = True
+
+    if iscoroutinefunction(vue):
+        @wraps(vue)
+        async def awrap(request, *args, **kwargs):
+            autoriser(request)
+            return await vue(request, *args, **kwargs)
+
+        return awrap
+
+    @wraps(vue)
+    def wrap(request, *args, **kwargs):
+        autoriser(request)
+        return vue(request, *args, **kwargs)
+
+    return wrap
+
+
+@contextmanager
+def lecture_principale():
+    """
+    Lit la base principale le temps du bloc, même dans une vue @lecture_replica.
+    Pour ce qui est gardé sous une version lue sur la base principale (pages
+    en cache, voir pages.py) : une réplique en retard y rangerait l'ancien
+    contenu sous la nouvelle version.
+    """
+    etat = _etat.get()
+    if etat is None or etat.principale:
+        yield
+        return
+    etat.principale = True
+    try:
+        yield
+    finally:
+        etat.principale = False
+
+
+class LectureEcritureRouter:
+    """Écritures sur la base principale, lectures selon la politique de la requête."""
+
+    def db_for_read(self, model, **hints):
+        etat = _etat.get()
+        if etat is None or not replica_disponible():
+            return None
+        if connections[ALIAS_PRINCIPAL].in_atomic_block:
+            return ALIAS_PRINCIPAL
+        return etat.alias
+
+    def db_for_write(self, model, **hints):
+        etat = _etat.get()
+        if etat is not None:
+            etat.ecriture = True
+        return ALIAS_PRINCIPAL
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # La réplique contient les mêmes données que la base principale
+        aliases = {ALIAS_PRINCIPAL, ALIAS_REPLICA}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplique est alimentée par la réplication, jamais migrée
+        if db == ALIAS_REPLICA:
+            return False
+        return None
@@ -0,0 +1,168 @@
+# restaurant/services.py
+import hashlib
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+
+from . import occupation
+from .models import Plat, Commande, LigneCommande, Table
+
+ESSAIS_ATTRIBUTION = 3
+
+
+class PanierInvalide(Exception):
+    """
+    Levée quand le contenu d'un panier ne permet pas de créer une commande
+    """
+
+
+class AucuneTableLibre(Exception):
+    """
+    Levée quand aucune table libre n'accueille le groupe au créneau demandé
+    """
+
+
+class PrixPerimes(PanierInvalide):
+    """
+    Levée quand un prix du panier a changé depuis que le client l'a vu.
+    `empreinte` est celle des prix actuels.
+    """
+
+    def __init__(self, message, empreinte):
+        super().__init__(message)
+        self.empreinte = empreinte
+
+
+def empreinte_prix(prix):
+    """Empreinte d'un dictionnaire {plat_id: prix}, pour comparer deux relevés de prix."""
+    return hashlib.md5(repr(sorted((int(plat_id), str(p)) for plat_id, p in prix.items())).encode()).hexdigest()
+
+
+def normaliser_panier(panier):
+    """
+    Convertit un panier en dictionnaire {plat_id: quantite}.
+
+    Accepte la liste d'articles envoyée par le JavaScript
+    ([{"id": 3, "quantite": 2, ...}, ...]) ou un dictionnaire {id: quantite}.
+    Les quantités nulles sont ignorées, les doublons sont cumulés.
+    """
+    if isinstance(panier, dict):
+        articles = panier.items()
+    else:
+        try:
+            articles = [(item['id'], item['quantite']) for item in panier]
+        except (KeyError, TypeError):
+            raise PanierInvalide("Le panier est mal formé.")
+
+    quantites = {}
+    for plat_id, quantite in articles:
+        try:
+            plat_id = int(plat_id)
+            quantite = int(quantite)
+        except (TypeError, ValueError):
+            raise PanierInvalide("Le panier est mal formé.")
+        if quantite < 0:
+            raise PanierInvalide("Les quantités doivent être positives.")
+        if quantite:
+            quantites[plat_id] = quantites.get(plat_id, 0) + quantite
+    return quantites
+
+
+@transaction.atomic
+def passer_commande(user, panier, mode_paiement='carte', telephone='', adresse_livraison='', empreinte=None):
+    """
+    Crée une commande et ses lignes à partir d'un panier.
+
+    Les prix sont toujours relus côté serveur : tous les plats du panier sont
+    chargés en une seule requête (in_bulk) et les lignes insérées en un seul
+    bulk_create. Le nombre de requêtes ne dépend donc pas de la taille du panier.
+    Avec `empreinte` (celle des prix affichés au client, voir panier_session.py),
+    la commande est refusée par PrixPerimes si un prix a changé depuis.
+    Les points fidélité sont crédités une seule fois, par la tâche planifiée
+    à la création de la commande (signals.py).
+    """
+    quantites = normaliser_panier(panier)
+    if not quantites:
+        raise PanierInvalide("Votre panier est vide.")
+
+    if mode_paiement not in dict(Commande.MODES_PAIEMENT):
+        raise PanierInvalide("Mode de paiement invalide.")
+
+    plats = Plat.objects.filter(disponible=True).in_bulk(list(quantites))
+    if len(plats) != len(quantites):
+        raise PanierInvalide("Un des plats du panier n'est plus disponible.")
+
+    if empreinte is not None:
+        actuelle = empreinte_prix({plat_id: plat.prix for plat_id, plat in plats.items()})
+        if actuelle != empreinte:
+            raise PrixPerimes("Les prix de votre panier ont changé : vérifiez-le avant de valider.", actuelle)
+
+    montant_total = sum(
+        (plats[plat_id].prix * quantite for plat_id, quantite in quantites.items()),
+        Decimal('0.00'),
+    )
+
+    commande = Commande.objects.create(
+        user=user,
+        montant_total=montant_total,
+        mode_paiement=mode_paiement,
+        telephone=telephone or '',
+        adresse_livraison=adresse_livraison or '',
+    )
+
+    LigneCommande.objects.bulk_create([
+        LigneCommande(
+            commande=commande,
+            plat=plats[plat_id],
+            quantite=quantite,
+            prix_unitaire=plats[plat_id].prix,
+        )
+        for plat_id, quantite in quantites.items()
+    ])
+
+    return commande
+
+
+def _reserver_table(reservation, table_id):
+    """
+    Enregistre la réservation sur `table_id` si le créneau y est libre en base.
+    La table reste verrouillée jusqu'à la fin de la transaction : deux
+    attributions simultanées de la même table passent l'une après l'autre.
+    Renvoie False si le créneau est déjà pris.
+    """
+    indice = occupation.indice_creneau(reservation.time)
+    try:
+        with transaction.atomic():
+            if Table.objects.select_for_update().filter(pk=table_id).first() is None:
+                return False
+            if occupation.creneau_occupe(table_id, reservation.date, indice):
+                return False
+            reservation.table_id = table_id
+            reservation.save()
+    except IntegrityError:
+        return False
+    return True
+
+
+def placer_reservation(reservation):
+    """
+    Enregistre une réservation sans table choisie sur la table attribuée par
+    occupation.attribuer_table(). La grille n'est qu'une indication : si le
+    créneau de cette table est déjà pris en base, la grille du jour est relue
+    et la table suivante essayée.
+    """
+    exclues = set()
+    for _ in range(ESSAIS_ATTRIBUTION):
+        table_id = occupation.attribuer_table(
+            reservation.date, reservation.time, reservation.nb_personnes, exclues,
+        )
+        if table_id is None:
+            break
+        if _reserver_table(reservation, table_id):
+            return reservation
+        exclues.add(table_id)
+        occupation.oublier(reservation.date)
+    reservation.table_id = None
+    raise AucuneTableLibre(
+        f"Aucune table pour {reservation.nb_personnes} personne(s) n'est libre à ce créneau."
+    )
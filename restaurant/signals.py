@@ -1,8 +1,16 @@
 # restaurant/signals.py
-from django.db.models.signals import post_save
+from decimal import Decimal
+
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import Profile, EmployeInfo
+from django.contrib.auth.signals import user_logged_in
+from .models import (
+    Profile, EmployeInfo, Reservation, Table, Plat, Categorie,
+    Avis, StatistiquesAvis, Commande, StatistiquesClient, PointsLedger, COMMANDE_CREEE,
+)
+from . import occupation, catalogue, ventes, images, pages, taches
+from .middleware import CLE_SESSION_ROLE
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -13,32 +21,231 @@ def create_user_profile(sender, instance, created, **kwargs):
         Profile.objects.create(user=instance)
 
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
+def create_user_statistiques(sender, instance, created, **kwargs):
+    """
+    Crée les compteurs du tableau de bord client avec l'utilisateur
+    """
+    if created:
+        StatistiquesClient.objects.create(user=instance)
+
+@receiver(post_save, sender=User)
+def save_user_profile(sender, instance, created, **kwargs):
     """
-    Sauvegarde le profil quand l'utilisateur est sauvegardé
+    Sauvegarde le profil quand l'utilisateur est sauvegardé.
+    Seulement s'il est déjà chargé : Profile.save() n'écrit rien s'il n'a pas
+    changé, et un profil jamais lu n'a rien à enregistrer.
     """
-    if hasattr(instance, 'profile'):
-        instance.profile.save()
+    profile = instance._state.fields_cache.get('profile')
+    if profile is not None and not created:
+        profile.save()
+
+@receiver(user_logged_in)
+def memoriser_role(sender, request, user, **kwargs):
+    """
+    Range le rôle dans la session dès la connexion (voir ProfileMiddleware)
+    """
+    profile = getattr(user, 'profile', None)
+    request.session[CLE_SESSION_ROLE] = profile.role if profile else None
 
 @receiver(post_save, sender=Profile)
 def create_employe_info(sender, instance, created, **kwargs):
     """
-    Crée automatiquement EmployeInfo si le rôle est 'employe'
-    """
-    if instance.role == 'employe':
-        if not hasattr(instance, 'employe_info'):
-            # ✅ Définir les horaires par défaut
-            horaires_defaut = {
-                "lundi": {"debut": "11:30", "fin": "22:30"},
-                "mardi": {"debut": "11:30", "fin": "22:30"},
-                "mercredi": {"debut": "11:30", "fin": "22:30"},
-                "jeudi": {"debut": "11:30", "fin": "22:30"},
-                "vendredi": {"debut": "11:30", "fin": "22:30"},
-                "samedi": {"debut": "Repos", "fin": ""},
-                "dimanche": {"debut": "Repos", "fin": ""}
-            }
-            
-            EmployeInfo.objects.get_or_create(
-                profile=instance,
-                defaults={'horaires': horaires_defaut}
-            )
+    Crée automatiquement EmployeInfo quand le profil devient 'employe'
+    """
+    if instance.role == 'employe' and (created or instance.valeur_initiale('role') != 'employe'):
+        # ✅ Horaires par défaut ; get_or_create garde les infos d'un ancien employé
+        horaires_defaut = {
+            "lundi": {"debut": "11:30", "fin": "22:30"},
+            "mardi": {"debut": "11:30", "fin": "22:30"},
+            "mercredi": {"debut": "11:30", "fin": "22:30"},
+            "jeudi": {"debut": "11:30", "fin": "22:30"},
+            "vendredi": {"debut": "11:30", "fin": "22:30"},
+            "samedi": {"debut": "Repos", "fin": ""},
+            "dimanche": {"debut": "Repos", "fin": ""}
+        }
+        
+        EmployeInfo.objects.get_or_create(
+            profile=instance,
+            defaults={'horaires': horaires_defaut}
+        )
+
+
+@receiver(post_save, sender=Reservation)
+def occuper_creneau(sender, instance, created, **kwargs):
+    """
+    Tient à jour la grille d'occupation quand une réservation est créée ou modifiée
+    """
+    if not created and instance.valeur_initiale('date') is not None:
+        occupation.liberer(
+            instance.valeur_initiale('table_id'),
+            instance.valeur_initiale('date'),
+            instance.valeur_initiale('time'),
+        )
+    occupation.marquer(instance.table_id, instance.date, instance.time)
+
+@receiver(post_delete, sender=Reservation)
+def liberer_creneau(sender, instance, **kwargs):
+    """
+    Libère le créneau d'une réservation supprimée
+    """
+    occupation.liberer(instance.table_id, instance.date, instance.time)
+
+@receiver(post_save, sender=Table)
+@receiver(post_delete, sender=Table)
+def invalider_tables(sender, **kwargs):
+    """
+    La liste des tables est en cache : on la recharge au prochain accès
+    """
+    occupation.invalider_tables()
+
+@receiver(pre_save, sender=Plat)
+def deriver_image_plat(sender, instance, **kwargs):
+    """
+    Produit les versions réduites d'une photo qui vient d'être envoyée
+    """
+    if not instance.image:
+        instance.image_empreinte, instance.image_largeur = '', None
+    elif not instance.image._committed:
+        images.deriver_plat(instance)
+
+@receiver(post_save, sender=Plat)
+@receiver(post_delete, sender=Plat)
+@receiver(post_save, sender=Categorie)
+@receiver(post_delete, sender=Categorie)
+def invalider_menu(sender, **kwargs):
+    """
+    Toute modification du menu change sa version : l'instantané en cache est abandonné
+    """
+    catalogue.invalider_menu()
+
+@receiver(post_save, sender=Avis)
+def compter_avis(sender, instance, created, **kwargs):
+    """
+    Met à jour l'agrégat des avis (nombre, moyenne, histogramme)
+    """
+    if created:
+        StatistiquesAvis.ajuster(instance.note, 1)
+    elif instance.valeur_initiale('note') not in (None, instance.note):
+        StatistiquesAvis.ajuster(instance.valeur_initiale('note'), -1)
+        StatistiquesAvis.ajuster(instance.note, 1)
+
+@receiver(post_delete, sender=Avis)
+def decompter_avis(sender, instance, **kwargs):
+    StatistiquesAvis.ajuster(instance.note, -1)
+
+@receiver(post_save, sender=Avis)
+@receiver(post_delete, sender=Avis)
+def invalider_pages_avis(sender, **kwargs):
+    """
+    La page des avis en cache pour les visiteurs anonymes est abandonnée
+    """
+    pages.invalider('avis')
+
+# ======================== STATISTIQUES CLIENT ========================
+
+def _depense(commande):
+    return 0 if commande.statut == 'annulee' else commande.montant_total
+
+def _annulation_changee(commande):
+    ancien_statut = commande.valeur_initiale('statut')
+    return ancien_statut is not None and (ancien_statut == 'annulee') != (commande.statut == 'annulee')
+
+@receiver(post_save, sender=Commande)
+def compter_commande(sender, instance, created, **kwargs):
+    # Création : voir effets_commande_creee
+    if not created and _annulation_changee(instance):
+        sens = -1 if instance.statut == 'annulee' else 1
+        StatistiquesClient.ajuster(instance.user_id, depenses_totales=sens * instance.montant_total)
+
+@receiver(post_delete, sender=Commande)
+def decompter_commande(sender, instance, **kwargs):
+    if instance._effets_annules:
+        return
+    StatistiquesClient.ajuster(instance.user_id, nb_commandes=-1, depenses_totales=-_depense(instance))
+
+@receiver(post_save, sender=Reservation)
+def compter_reservation(sender, instance, created, **kwargs):
+    if created:
+        StatistiquesClient.ajuster(instance.user_id, nb_reservations=1)
+
+@receiver(post_delete, sender=Reservation)
+def decompter_reservation(sender, instance, **kwargs):
+    StatistiquesClient.ajuster(instance.user_id, nb_reservations=-1)
+
+@receiver(post_save, sender=Avis)
+def compter_avis_client(sender, instance, created, **kwargs):
+    if created:
+        StatistiquesClient.ajuster(instance.user_id, nb_avis=1)
+
+@receiver(post_delete, sender=Avis)
+def decompter_avis_client(sender, instance, **kwargs):
+    StatistiquesClient.ajuster(instance.user_id, nb_avis=-1)
+
+# ======================== EFFETS D'UNE NOUVELLE COMMANDE ========================
+
+@receiver(post_save, sender=Commande)
+def planifier_effets_commande(sender, instance, created, **kwargs):
+    """
+    Points fidélité, compteurs du client et agrégats des ventes d'une nouvelle
+    commande : planifiés dans sa transaction, appliqués par le worker
+    (taches.py). La requête du client ne paie que l'insertion.
+
+    Une annulation ou une suppression ne corrige que ce qui a été compté :
+    la tâche en attente est exécutée avant un changement d'annulation (avec
+    les valeurs de la création), abandonnée avant une suppression.
+    """
+    if created:
+        taches.planifier(
+            COMMANDE_CREEE,
+            commande_id=instance.pk,
+            depenses=str(_depense(instance)),
+            comptabiliser=instance.statut != 'annulee',
+        )
+    elif _annulation_changee(instance):
+        taches.rattraper(COMMANDE_CREEE, commande_id=instance.pk)
+
+@receiver(pre_delete, sender=Commande)
+def abandonner_effets_commande(sender, instance, **kwargs):
+    # La ligne verrouillée, la marque est lue dans la transaction de la suppression :
+    # un worker en cours a soit déjà compté la commande (on retire), soit attend
+    # le verrou et ne la trouvera plus (rien à retirer)
+    appliques = Commande.objects.select_for_update().filter(pk=instance.pk).values_list(
+        'effets_appliques', flat=True
+    ).first()
+    taches.annuler(COMMANDE_CREEE, commande_id=instance.pk)
+    instance._effets_annules = not appliques
+
+@taches.tache(COMMANDE_CREEE)
+def effets_commande_creee(commande_id, depenses, comptabiliser):
+    # Verrou partagé avec abandonner_effets_commande : voir plus haut
+    commande = Commande.objects.select_for_update(of=('self',)).select_related('user').filter(
+        pk=commande_id
+    ).first()
+    if commande is None or commande.effets_appliques:
+        # Supprimée (avec son client) ou déjà comptée : rien à faire
+        return
+
+    if commande.points_gagnes:
+        PointsLedger.enregistrer(commande.user, commande.points_gagnes, 'commande', commande=commande)
+    StatistiquesClient.ajuster(commande.user_id, nb_commandes=1, depenses_totales=Decimal(depenses))
+    # Les lignes, insérées après la commande, sont lues ici
+    if comptabiliser:
+        ventes.comptabiliser(commande, 1)
+    Commande.objects.filter(pk=commande_id).update(effets_appliques=True)
+
+# ======================== AGRÉGATS DES VENTES ========================
+
+@receiver(post_save, sender=Commande)
+def comptabiliser_commande(sender, instance, created, **kwargs):
+    """
+    Ajoute une commande aux agrégats des ventes, ou l'en retire si elle est annulée
+    """
+    # Création : voir effets_commande_creee
+    if not created and _annulation_changee(instance):
+        ventes.comptabiliser(instance, -1 if instance.statut == 'annulee' else 1)
+
+@receiver(pre_delete, sender=Commande)
+def decomptabiliser_commande(sender, instance, **kwargs):
+    # pre_delete : les lignes, supprimées en cascade, sont encore lisibles
+    if instance.statut != 'annulee' and not instance._effets_annules:
+        ventes.comptabiliser(instance, -1)
@@ -0,0 +1,156 @@
+# restaurant/taches.py
+"""
+File de tâches différées, rangée dans la base (modèle Tache).
+
+Une vue qui veut faire un travail non urgent (points fidélité, compteurs,
+agrégats...) l'inscrit avec planifier() : la ligne est insérée dans la même
+transaction que les données dont elle dépend, elle n'existe donc que si la
+transaction est validée. Le processus `manage.py run_worker` la réserve puis
+l'exécute, hors de toute requête.
+
+Réservation : sur PostgreSQL, SELECT ... FOR UPDATE SKIP LOCKED laisse
+chaque worker prendre des tâches différentes sans attendre les autres. SQLite
+n'a pas de verrous de ligne mais sérialise les écritures : la réservation y
+est un seul UPDATE ... WHERE id IN (SELECT ... LIMIT n). Une tâche réservée
+par un worker arrêté en route est reprise après DUREE_RESERVATION.
+
+Le travail et le passage à « terminée » sont validés dans la même
+transaction : une tâche terminée n'est jamais rejouée, une tâche en échec
+est annulée entière puis retentée plus tard (DELAI_BASE, doublé à chaque
+tentative), jusqu'à tentatives_max.
+"""
+import logging
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Tache
+
+logger = logging.getLogger('restaurant.taches')
+
+LOT = 10
+DUREE_RESERVATION = timedelta(minutes=5)
+DELAI_BASE = timedelta(seconds=10)
+CONSERVATION = timedelta(days=7)  # tâches terminées gardées pour consultation
+
+REGISTRE = {}
+
+
+class ReservationPerdue(Exception):
+    """La tâche a été reprise par un autre worker pendant son exécution."""
+
+
+def tache(nom):
+    """Enregistre la fonction décorée sous `nom`, pour planifier(nom, ...)."""
+    def decorateur(fonction):
+        REGISTRE[nom] = fonction
+        return fonction
+
+    return decorateur
+
+
+def planifier(nom, delai=None, **arguments):
+    """
+    Inscrit une tâche dans la transaction courante. Les arguments sont
+    enregistrés en JSON : identifiants et valeurs simples seulement.
+    """
+    if nom not in REGISTRE:
+        raise LookupError(f"Tâche inconnue : {nom}")
+    return Tache.objects.create(
+        nom=nom,
+        arguments=arguments,
+        executer_apres=timezone.now() + (delai or timedelta(0)),
+    )
+
+
+def _disponibles(maintenant):
+    return Tache.objects.filter(
+        Q(statut=Tache.A_FAIRE, executer_apres__lte=maintenant)
+        | Q(statut=Tache.EN_COURS, reservee_jusqu_a__lt=maintenant)
+    )
+
+
+def reserver(lot=LOT, **filtres):
+    """Réserve jusqu'à `lot` tâches disponibles et les renvoie, plus anciennes d'abord."""
+    maintenant = timezone.now()
+    jeton = uuid.uuid4().hex
+    disponibles = _disponibles(maintenant).filter(**filtres).order_by('executer_apres', 'pk')
+    reservation = {
+        'statut': Tache.EN_COURS,
+        'jeton': jeton,
+        'reservee_jusqu_a': maintenant + DUREE_RESERVATION,
+        'tentatives': F('tentatives') + 1,
+    }
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            # Les tâches verrouillées par un autre worker sont sautées, sans attente
+            ids = list(disponibles.select_for_update(skip_locked=True).values_list('pk', flat=True)[:lot])
+            Tache.objects.filter(pk__in=ids).update(**reservation)
+    else:
+        Tache.objects.filter(pk__in=disponibles.values('pk')[:lot]).update(**reservation)
+
+    return list(Tache.objects.filter(jeton=jeton).order_by('executer_apres', 'pk'))
+
+
+def executer(tache):
+    """Exécute une tâche réservée. Renvoie True si elle est terminée."""
+    fonction = REGISTRE.get(tache.nom)
+    reservee = Tache.objects.filter(pk=tache.pk, jeton=tache.jeton)
+    try:
+        with transaction.atomic():
+            if fonction is None:
+                raise LookupError(f"Tâche inconnue : {tache.nom}")
+            fonction(**tache.arguments)
+            if not reservee.update(statut=Tache.TERMINEE, date_fin=timezone.now(), jeton='', reservee_jusqu_a=None):
+                raise ReservationPerdue
+    except ReservationPerdue:
+        logger.warning("Tâche %s #%s reprise par un autre worker : résultat abandonné", tache.nom, tache.pk)
+        return False
+    except Exception:
+        definitive = fonction is None or tache.tentatives >= tache.tentatives_max
+        logger.exception(
+            "Tâche %s #%s en échec (tentative %s/%s)", tache.nom, tache.pk, tache.tentatives, tache.tentatives_max,
+        )
+        reservee.update(
+            statut=Tache.ECHOUEE if definitive else Tache.A_FAIRE,
+            executer_apres=timezone.now() + DELAI_BASE * 2 ** (tache.tentatives - 1),
+            derniere_erreur=traceback.format_exc(),
+            jeton='',
+            reservee_jusqu_a=None,
+        )
+        return False
+    return True
+
+
+def traiter(lot=LOT, **filtres):
+    """Réserve et exécute un lot de tâches. Renvoie (réservées, terminées)."""
+    taches = reserver(lot, **filtres)
+    return len(taches), sum(executer(tache) for tache in taches)
+
+
+def _filtres(arguments):
+    return {f'arguments__{cle}': valeur for cle, valeur in arguments.items()}
+
+
+def rattraper(nom, **arguments):
+    """
+    Exécute tout de suite les tâches `nom` encore en attente pour ces
+    arguments, quand la suite ne peut pas attendre le worker.
+    """
+    while traiter(nom=nom, **_filtres(arguments))[0]:
+        pass
+
+
+def annuler(nom, **arguments):
+    """Supprime les tâches `nom` pas encore commencées pour ces arguments. Renvoie leur nombre."""
+    return Tache.objects.filter(nom=nom, statut=Tache.A_FAIRE, **_filtres(arguments)).delete()[0]
+
+
+def purger():
+    """Supprime les tâches terminées depuis plus de CONSERVATION."""
+    return Tache.objects.filter(statut=Tache.TERMINEE, date_fin__lt=timezone.now() - CONSERVATION).delete()[0]
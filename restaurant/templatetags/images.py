@@ -0,0 +1,65 @@
+import posixpath
+
+from django import template
+from django.core.files.storage import default_storage
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+from restaurant import images
+
+register = template.Library()
+
+TAILLES = '(max-width: 600px) 100vw, 300px'
+
+
+def _balise(srcsets, src, alt, sizes):
+    """<picture> avec une source WebP et un <img> JPEG de repli."""
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" loading="lazy" decoding="async"></picture>',
+        srcsets['webp'], sizes, src, srcsets['jpg'], sizes, alt,
+    )
+
+
+def _image_statique(chemin, alt, sizes):
+    nom = posixpath.basename(chemin)
+    derive = images.manifeste_statiques().get(nom)
+    if not derive:
+        return format_html('<img src="{}" alt="{}" loading="lazy">', static(chemin), alt)
+    srcsets = images.sources(images.DOSSIER_STATIQUES, derive['base'], derive['largeur'], static)
+    src = static(images.nom_derive(images.DOSSIER_STATIQUES, derive['base'], images.largeurs(derive['largeur'])[-1], 'jpg'))
+    return _balise(srcsets, src, alt, sizes)
+
+
+@register.simple_tag
+def image_statique(chemin, alt='', sizes=TAILLES):
+    """
+    Image fournie avec l'application, avec ses versions réduites si
+    generer_derives --statiques les a produites :
+    {% image_statique 'restaurant/images/pizza.png' alt='Pizza' sizes='120px' %}
+    """
+    return _image_statique(chemin, alt, sizes)
+
+
+@register.simple_tag
+def image_plat(plat, defaut='', alt='', sizes=TAILLES):
+    """
+    Photo d'un plat (objet Plat ou entrée de l'instantané du menu) en
+    srcset. Sans photo traitée, affiche l'image fournie `defaut`
+    (nom de fichier dans restaurant/images).
+    """
+    if isinstance(plat, dict):
+        nom, empreinte, largeur = plat.get('image'), plat.get('image_empreinte'), plat.get('image_largeur')
+    else:
+        nom, empreinte, largeur = plat.image.name, plat.image_empreinte, plat.image_largeur
+
+    if nom and empreinte and largeur:
+        dossier = posixpath.dirname(nom)
+        srcsets = images.sources(dossier, empreinte, largeur, default_storage.url)
+        src = default_storage.url(images.nom_derive(dossier, empreinte, images.largeurs(largeur)[-1], 'jpg'))
+        return _balise(srcsets, src, alt, sizes)
+    if nom:
+        return format_html('<img src="{}" alt="{}" loading="lazy">', default_storage.url(nom), alt)
+    if defaut:
+        return _image_statique(f'restaurant/images/{defaut}', alt, sizes)
+    return ''
@@ -0,0 +1,188 @@
+# restaurant/test_performances.py
+"""
+Banc d'essai des pages les plus sollicitées.
+
+Chaque page est appelée plusieurs fois par le client de test sur un jeu de
+données réaliste ; le test échoue si une page dépasse son budget de requêtes
+SQL (un N+1 introduit dans un template se voit tout de suite). Les temps de
+réponse sont mesurés et le rapport (p50 / p95 / max) affiché quand la
+variable BENCHMARK est définie :
+
+    BENCHMARK=50 python manage.py test restaurant.test_performances
+
+Les temps dépendent de la machine : ils sont rapportés, pas vérifiés.
+"""
+import json
+import os
+import sys
+import time as chrono
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from restaurant.models import (
+    Avis, Categorie, Commande, LigneCommande, Plat, Reservation, StatistiquesAvis,
+    StatistiquesClient, Table,
+)
+
+REPETITIONS = int(os.environ.get('BENCHMARK') or 5)
+
+NB_PLATS_PAR_CATEGORIE = 20
+NB_TABLES = 20
+NB_COMMANDES = 200
+NB_AVIS = 300
+NB_RESERVATIONS = 60
+
+# Nombre maximal de requêtes SQL par appel, session et authentification comprises.
+# Une commande ne paie que son insertion : points, compteurs et agrégats des
+# ventes sont planifiés pour le worker (taches.py).
+BUDGETS = {
+    'commander (GET)': 4,  # dont la version du menu, relue en base toutes les 5 s
+    'commander (POST)': 8,
+    'panier (GET)': 2,
+    'panier (POST)': 8,
+    'panier (API)': 5,  # dont l'écriture de la session ; prix lus dans l'instantané du menu
+    'valider_commande': 8,
+    'avis': 5,  # dont la version des avis, relue en base toutes les 5 s
+    'mes_commandes': 6,  # dont l'état des commandes qui sert d'ETag
+    'mon_compte': 8,
+    'mon_compte_employe': 6,
+    'reservations': 3,
+}
+
+
+def centile(valeurs, p):
+    valeurs = sorted(valeurs)
+    return valeurs[min(len(valeurs) - 1, int(round(p / 100 * (len(valeurs) - 1))))]
+
+
+class PerformancesTest(TestCase):
+    """Budgets de requêtes et temps de réponse des pages principales"""
+
+    resultats = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user = User.objects.create_user(username='client1', password='testpass123')
+        cls.employe = User.objects.create_user(username='employe1', password='testpass123')
+        cls.employe.profile.role = 'employe'
+        cls.employe.profile.save()
+
+        cls.plats = []
+        for type_, nom in Categorie.TYPES:
+            categorie = Categorie.objects.create(nom=nom, type=type_)
+            cls.plats += Plat.objects.bulk_create([
+                Plat(nom=f'{nom} {i}', description='Fait maison', prix=Decimal(8 + i % 10), categorie=categorie)
+                for i in range(NB_PLATS_PAR_CATEGORIE)
+            ])
+
+        tables = Table.objects.bulk_create([Table(number=i + 1, seats=2 + i % 4) for i in range(NB_TABLES)])
+
+        # Historique : commandes de trois plats, dont une partie encore à servir
+        commandes = Commande.objects.bulk_create([
+            Commande(
+                user=cls.client_user,
+                montant_total=Decimal('30.00'),
+                mode_paiement='carte',
+                telephone='0600000000',
+                statut='en_attente' if i % 10 == 0 else 'livree',
+            )
+            for i in range(NB_COMMANDES)
+        ])
+        LigneCommande.objects.bulk_create([
+            LigneCommande(commande=commande, plat=cls.plats[(i + j) % len(cls.plats)], quantite=1,
+                          prix_unitaire=Decimal('10.00'))
+            for i, commande in enumerate(commandes)
+            for j in range(3)
+        ])
+
+        demain = date.today() + timedelta(days=1)
+        Reservation.objects.bulk_create([
+            Reservation(user=cls.client_user, table=tables[i % NB_TABLES],
+                        date=demain + timedelta(days=i // NB_TABLES), time=time(19, 0))
+            for i in range(NB_RESERVATIONS)
+        ])
+
+        Avis.objects.bulk_create([
+            Avis(user=cls.client_user, note=1 + i % 5, commentaire=f'Très bon repas numéro {i}')
+            for i in range(NB_AVIS)
+        ])
+
+        # Les insertions en masse n'envoient pas de signaux
+        StatistiquesAvis.recalculer()
+        StatistiquesClient.recalculer(cls.client_user)
+
+    def setUp(self):
+        cache.clear()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if os.environ.get('BENCHMARK'):
+            sys.stderr.write(f"\n{'page':<22}{'requêtes':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}\n")
+            for nom, (requetes, durees) in sorted(cls.resultats.items()):
+                sys.stderr.write(
+                    f"{nom:<22}{requetes:>10}{centile(durees, 50):>10.1f}"
+                    f"{centile(durees, 95):>10.1f}{max(durees):>10.1f}\n"
+                )
+
+    def mesurer(self, nom, appel, statut=200):
+        """
+        Appelle `appel` REPETITIONS fois (le premier appel trouve le cache
+        vide) et vérifie le budget de requêtes de chaque appel.
+        """
+        durees = []
+        maximum = 0
+        for _ in range(REPETITIONS):
+            with CaptureQueriesContext(connection) as requetes:
+                debut = chrono.perf_counter()
+                response = appel()
+                durees.append((chrono.perf_counter() - debut) * 1000)
+            self.assertEqual(response.status_code, statut, nom)
+            maximum = max(maximum, len(requetes))
+            self.assertLessEqual(
+                len(requetes), BUDGETS[nom],
+                f"{nom} : {len(requetes)} requêtes pour un budget de {BUDGETS[nom]}\n"
+                + "\n".join(q['sql'] for q in requetes.captured_queries),
+            )
+        self.resultats[nom] = (maximum, durees)
+
+    def panier_json(self):
+        return json.dumps([{'id': plat.id, 'quantite': 2} for plat in self.plats[:3]])
+
+    def test_pages_client(self):
+        """Test : Les pages client restent dans leur budget de requêtes"""
+        self.client.login(username='client1', password='testpass123')
+
+        self.mesurer('commander (GET)', lambda: self.client.get(reverse('commander')))
+        self.mesurer('commander (POST)', lambda: self.client.post(reverse('commander'), {
+            f'quantite_{plat.id}': 1 for plat in self.plats[:5]
+        }))
+        self.mesurer('panier (GET)', lambda: self.client.get(reverse('panier')))
+        self.mesurer('panier (POST)', lambda: self.client.post(reverse('panier'), {
+            'panier_data': self.panier_json(),
+            'mode_paiement': 'carte',
+            'telephone': '0600000000',
+        }), statut=302)
+        self.mesurer('panier (API)', lambda: self.client.post(reverse('panier_ajouter'), {
+            'plat_id': self.plats[0].id,
+        }))
+        self.mesurer('valider_commande', lambda: self.client.post(reverse('valider_commande'), {
+            'panier_json': self.panier_json(),
+        }))
+        self.mesurer('mes_commandes', lambda: self.client.get(reverse('mes_commandes')))
+        self.mesurer('mon_compte', lambda: self.client.get(reverse('mon_compte')))
+        self.mesurer('reservations', lambda: self.client.get(reverse('reservations')))
+        self.mesurer('avis', lambda: self.client.get(reverse('avis')))
+
+    def test_pages_employe(self):
+        """Test : L'espace employé reste dans son budget de requêtes"""
+        self.client.login(username='employe1', password='testpass123')
+
+        self.mesurer('mon_compte_employe', lambda: self.client.get(reverse('mon_compte_employe')))
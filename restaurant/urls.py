@@ -1,5 +1,9 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import views, views_async
+
+# Pages en lecture seule qui ont une variante asynchrone dans views_async.py
+LECTURE_SEULE = ('menu', 'avis', 'mes_commandes', 'mes_reservations', 'mon_compte')
 
 urlpatterns = [
     # Pages publiques
@@ -18,6 +22,7 @@ urlpatterns = [
     
     # Réservations (clients uniquement)
     path('reservations/', views.reservations, name='reservations'),
+    path('reservations/disponibilites/', views.disponibilites, name='disponibilites'),
     path('mes_reservations/', views.mes_reservations, name='mes_reservations'),
     path('annuler-reservation/<int:reservation_id>/', views.annuler_reservation, name='annuler_reservation'),
 
@@ -25,6 +30,10 @@ urlpatterns = [
     path('commander/', views.commander, name='commander'),
     path('commander/valider/', views.valider_commande, name='valider_commande'),
     path('panier/', views.panier, name='panier'),
+    path('panier/contenu/', views.panier_contenu, name='panier_contenu'),
+    path('panier/ajouter/', views.panier_ajouter, name='panier_ajouter'),
+    path('panier/modifier/', views.panier_modifier, name='panier_modifier'),
+    path('panier/retirer/', views.panier_retirer, name='panier_retirer'),
     path('mes-commandes/', views.mes_commandes, name='mes_commandes'),
 
     # Avis (accessible à tous les connectés)
@@ -35,4 +44,21 @@ urlpatterns = [
     path('mon_compte_employe/', views.mon_compte_employe, name='mon_compte_employe'),
     path('update-employe-info/', views.update_employe_info, name='update_employe_info'),
     path('changer_statut_commande/<int:commande_id>/', views.changer_statut_commande, name='changer_statut_commande'),
-]
\ No newline at end of file
+    path('employe/commandes/flux/', views_async.flux_commandes, name='flux_commandes'),
+    path('employe/ventes/', views.rapport_ventes, name='rapport_ventes'),
+
+    # Administration
+    path('administration/export-commandes/', views.export_commandes, name='export_commandes'),
+]
+
+def asynchrones(motifs):
+    """Les mêmes routes, avec les variantes asynchrones des pages LECTURE_SEULE."""
+    return [
+        path(str(motif.pattern), getattr(views_async, motif.callback.__name__), name=motif.name)
+        if motif.name in LECTURE_SEULE else motif
+        for motif in motifs
+    ]
+
+# Sous ASGI, ces pages attendent la base sans passer par un thread
+if settings.SERVEUR_ASGI:
+    urlpatterns = asynchrones(urlpatterns)
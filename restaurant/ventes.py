@@ -0,0 +1,170 @@
+# restaurant/ventes.py
+"""
+Agrégats des ventes par jour et par heure (VentesJour, VentesHeure), pour le
+total, chaque catégorie et chaque plat.
+
+Les agrégats sont tenus à jour au fil de l'eau par les signaux de Commande
+(voir signals.py) : une commande ajoute ses montants à sa création et les
+retire si elle est annulée ou supprimée. Chaque mise à jour coûte quelques
+requêtes quel que soit le nombre de plats : les lignes manquantes sont créées
+en un bulk_create, puis toutes incrémentées en un seul UPDATE par table.
+reconstruire() recalcule une période depuis les tables de commandes.
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.apps import apps as global_apps
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, Value, When
+from django.db.models.functions import ExtractHour, TruncDate
+from django.utils import timezone
+
+from .models import COMMANDE_CREEE, LigneCommande, Tache, VentesHeure, VentesJour
+
+TOTAL = ('total', 0)
+
+
+def periode(date_creation):
+    """(jour, heure) locaux d'une date de commande."""
+    locale = timezone.localtime(date_creation)
+    return locale.date(), locale.hour
+
+
+def _deltas(commande, lignes, sens):
+    """{(dimension, objet_id): [chiffre_affaires, nb_commandes, quantite]}"""
+    deltas = {TOTAL: [commande.montant_total * sens, sens, 0]}
+    for plat_id, categorie_id, quantite, prix_unitaire in lignes:
+        deltas[TOTAL][2] += quantite * sens
+        for cle in (('categorie', categorie_id), ('plat', plat_id)):
+            # Une commande ne compte qu'une fois par plat ou catégorie
+            valeurs = deltas.setdefault(cle, [Decimal('0.00'), sens, 0])
+            valeurs[0] += prix_unitaire * quantite * sens
+            valeurs[2] += quantite * sens
+    return deltas
+
+
+def _appliquer(modele, filtres, deltas):
+    modele.objects.bulk_create(
+        [modele(dimension=dimension, objet_id=objet_id, **filtres) for dimension, objet_id in deltas],
+        ignore_conflicts=True,
+    )
+
+    def variation(indice, champ):
+        return F(champ) + Case(
+            *[
+                When(dimension=dimension, objet_id=objet_id, then=Value(valeurs[indice]))
+                for (dimension, objet_id), valeurs in deltas.items()
+            ],
+            default=Value(0),
+            output_field=modele._meta.get_field(champ),
+        )
+
+    cibles = Q()
+    for dimension, objet_id in deltas:
+        cibles |= Q(dimension=dimension, objet_id=objet_id)
+    modele.objects.filter(cibles, **filtres).update(
+        chiffre_affaires=variation(0, 'chiffre_affaires'),
+        nb_commandes=variation(1, 'nb_commandes'),
+        quantite=variation(2, 'quantite'),
+    )
+
+
+def comptabiliser(commande, sens=1):
+    """
+    Ajoute (sens=1) ou retire (sens=-1) une commande des agrégats de son jour
+    et de son heure, d'après ses lignes actuelles.
+    """
+    lignes = LigneCommande.objects.filter(commande_id=commande.pk).values_list(
+        'plat_id', 'plat__categorie_id', 'quantite', 'prix_unitaire'
+    )
+    deltas = _deltas(commande, lignes, sens)
+    jour, heure = periode(commande.date_creation)
+    with transaction.atomic(savepoint=False):
+        _appliquer(VentesJour, {'jour': jour}, deltas)
+        _appliquer(VentesHeure, {'jour': jour, 'heure': heure}, deltas)
+
+
+# ============================================
+# RECONSTRUCTION
+# ============================================
+
+@transaction.atomic
+def reconstruire(debut=None, fin=None, apps=global_apps):
+    """
+    Recalcule les agrégats des jours `debut` à `fin` inclus (tout l'historique
+    par défaut) à partir des commandes non annulées. Renvoie le nombre de
+    lignes horaires écrites. Les commandes dont la tâche de création est à
+    faire ou en cours sont laissées de côté : elle les ajoutera elle-même.
+
+    `apps` permet l'appel depuis une migration avec les modèles historiques.
+    """
+    Commande = apps.get_model('restaurant', 'Commande')
+    Ligne = apps.get_model('restaurant', 'LigneCommande')
+    Jour = apps.get_model('restaurant', 'VentesJour')
+    Heure = apps.get_model('restaurant', 'VentesHeure')
+
+    fuseau = timezone.get_current_timezone()
+    commandes = Commande.objects.exclude(statut='annulee')
+    lignes = Ligne.objects.exclude(commande__statut='annulee')
+    jours = Jour.objects.all()
+    heures = Heure.objects.all()
+    if apps is global_apps:
+        # Pas de file de tâches avant la migration 0017
+        en_attente = Tache.en_attente(COMMANDE_CREEE, 'commande_id')
+        commandes = commandes.exclude(pk__in=en_attente)
+        lignes = lignes.exclude(commande_id__in=en_attente)
+    if debut:
+        borne = timezone.make_aware(datetime.combine(debut, time.min))
+        commandes = commandes.filter(date_creation__gte=borne)
+        lignes = lignes.filter(commande__date_creation__gte=borne)
+        jours, heures = jours.filter(jour__gte=debut), heures.filter(jour__gte=debut)
+    if fin:
+        borne = timezone.make_aware(datetime.combine(fin + timedelta(days=1), time.min))
+        commandes = commandes.filter(date_creation__lt=borne)
+        lignes = lignes.filter(commande__date_creation__lt=borne)
+        jours, heures = jours.filter(jour__lte=fin), heures.filter(jour__lte=fin)
+
+    def par_heure(requete, champ_date, *groupes):
+        return requete.order_by().annotate(
+            p_jour=TruncDate(champ_date, tzinfo=fuseau),
+            p_heure=ExtractHour(champ_date, tzinfo=fuseau),
+        ).values('p_jour', 'p_heure', *groupes)
+
+    # {(jour, heure, dimension, objet_id): [chiffre_affaires, nb_commandes, quantite]}
+    agregats = {}
+    for ligne in par_heure(commandes, 'date_creation').annotate(
+        ca=Sum('montant_total'), nb=Count('id'),
+    ):
+        agregats[(ligne['p_jour'], ligne['p_heure'], *TOTAL)] = [ligne['ca'], ligne['nb'], 0]
+
+    montant = Sum(F('prix_unitaire') * F('quantite'), output_field=DecimalField(max_digits=12, decimal_places=2))
+    for dimension, champ in (('categorie', 'plat__categorie_id'), ('plat', 'plat_id')):
+        for ligne in par_heure(lignes, 'commande__date_creation', champ).annotate(
+            ca=montant, qte=Sum('quantite'), nb=Count('commande_id', distinct=True),
+        ):
+            cle = (ligne['p_jour'], ligne['p_heure'])
+            agregats[(*cle, dimension, ligne[champ])] = [ligne['ca'], ligne['nb'], ligne['qte']]
+            if dimension == 'categorie':
+                agregats.setdefault((*cle, *TOTAL), [Decimal('0.00'), 0, 0])[2] += ligne['qte']
+
+    # Une commande tombe dans une seule heure : les jours sont la somme des heures
+    quotidiens = {}
+    for (jour, _, dimension, objet_id), valeurs in agregats.items():
+        cumul = quotidiens.setdefault((jour, dimension, objet_id), [Decimal('0.00'), 0, 0])
+        for i, valeur in enumerate(valeurs):
+            cumul[i] += valeur
+
+    def champs(valeurs):
+        return {'chiffre_affaires': valeurs[0], 'nb_commandes': valeurs[1], 'quantite': valeurs[2]}
+
+    jours.delete()
+    heures.delete()
+    Heure.objects.bulk_create([
+        Heure(jour=jour, heure=heure, dimension=dimension, objet_id=objet_id, **champs(valeurs))
+        for (jour, heure, dimension, objet_id), valeurs in agregats.items()
+    ], batch_size=500)
+    Jour.objects.bulk_create([
+        Jour(jour=jour, dimension=dimension, objet_id=objet_id, **champs(valeurs))
+        for (jour, dimension, objet_id), valeurs in quotidiens.items()
+    ], batch_size=500)
+    return len(agregats)
@@ -1,23 +1,36 @@
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import JsonResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import condition
 from django.contrib.auth import login, authenticate, logout
 from django.contrib import messages
-from .models import Table, Reservation, Avis, Plat, Categorie, Commande, LigneCommande
+from .models import Table, Reservation, Avis, Categorie, Commande
 from .forms import RegisterForm, ReservationForm, CommandeForm, AvisForm
-from decimal import Decimal
 import json
-from .decorators import client_required, employe_required, role_required
-from .models import EmployeInfo
+from datetime import date, timedelta
+from django.db.models import Sum
+from .decorators import client_required, employe_required, role_required, staff_required
+from .models import EmployeInfo, StatistiquesAvis, StatistiquesClient, VentesJour, VentesHeure, Plat
+from .services import passer_commande, normaliser_panier, placer_reservation, AucuneTableLibre, PanierInvalide
+from . import occupation, catalogue, cuisine, exports, panier_session
+from .pages import cache_anonyme, etag_avis, etag_commandes, etag_menu
+from .pagination import encoder_curseur, decoder_curseur, avant
+from .routers import lecture_replica
 
 # ============================================
 # PAGES PUBLIQUES
 # ============================================
 
+@cache_anonyme(60 * 60)
 def page_accueil(request):
     return render(request, "restaurant/accueil.html")
 
+@condition(etag_func=etag_menu)
+@cache_anonyme(60 * 60, dependances=('menu',))
+@lecture_replica
 def page_menu(request):
-    return render(request, "restaurant/menu.html")
+    return render(request, "restaurant/menu.html", {'version_menu': catalogue.version_menu()})
 
 # ============================================
 # AUTHENTIFICATION
@@ -33,6 +46,7 @@ def login_view(request):
         user = authenticate(request, username=username, password=password)
         if user is not None:
             login(request, user)
+            # Le profil a été chargé avec l'utilisateur par ProfileBackend
             if user.is_superuser:
                 return redirect('/admin/')
             elif hasattr(user, 'profile') and user.profile.role == 'employe':
@@ -51,11 +65,7 @@ def register_view(request):
         form = RegisterForm(request.POST)
         if form.is_valid():
             user = form.save()
-            role = form.cleaned_data.get("role")
-            if hasattr(user, 'profile'):
-                user.profile.role = role
-                user.profile.save()
-            login(request, user)
+            login(request, user, backend='restaurant.backends.ProfileBackend')
             messages.success(request, "Compte créé avec succès !")
             return redirect('accueil')
     else:
@@ -79,23 +89,24 @@ def page_client(request):
 def page_employe(request):
     return render(request, "restaurant/employe.html")
 
+HISTORIQUE_MAX = 10
+
 @login_required
 def client(request):
     user = request.user
     
-    # Récupérer toutes les données du client
-    commandes = Commande.objects.filter(user=user).order_by('-date_creation')
-    reservations = Reservation.objects.filter(user=user).order_by('-date')
-    avis_list = Avis.objects.filter(user=user).order_by('-date_creation')
-    
-    # Calcul des points (optionnel si tu veux la somme à la volée)
-    points_total = sum(c.points_gagnes for c in commandes)
+    # Récupérer les dernières données du client
+    commandes = Commande.objects.filter(user=user).prefetch_related('lignes__plat').order_by('-date_creation')[:HISTORIQUE_MAX]
+    reservations = Reservation.objects.filter(user=user).select_related('table').order_by('-date')[:HISTORIQUE_MAX]
+    avis_list = Avis.objects.filter(user=user).order_by('-date_creation')[:HISTORIQUE_MAX]
     
     context = {
+        'statistiques': StatistiquesClient.obtenir(user),
         'commandes': commandes,
         'reservations': reservations,
         'avis_list': avis_list,
-        'points_total': points_total,
+        # Le solde est tenu par le journal des points : inutile de le resommer
+        'points_total': user.profile.points,
     }
     
     return render(request, 'restaurant/client.html', context)
@@ -112,18 +123,55 @@ def reservations(request):
         if form.is_valid():
             reservation = form.save(commit=False)
             reservation.user = request.user
-            reservation.save()
-            messages.success(request, f"Réservation confirmée pour la table {reservation.table.number} le {reservation.date} à {reservation.time}.")
-            return redirect('reservations')
+            try:
+                if reservation.table_id is None:
+                    placer_reservation(reservation)
+                else:
+                    reservation.save()
+            except AucuneTableLibre as e:
+                messages.error(request, str(e))
+            else:
+                messages.success(request, f"Réservation confirmée pour la table {reservation.table.number} le {reservation.date} à {reservation.time}.")
+                return redirect('reservations')
         else:
             messages.error(request, "Erreur dans le formulaire. Veuillez vérifier les informations.")
     else:
         form = ReservationForm()
     return render(request, 'restaurant/reservations.html', {'tables': tables, 'form': form})
 
+@login_required(login_url='login')
+def disponibilites(request):
+    """
+    Tables libres par créneau pour une date (?date=AAAA-MM-JJ)
+    ou une période (?debut=AAAA-MM-JJ&fin=AAAA-MM-JJ), en un seul appel
+    """
+    try:
+        if 'date' in request.GET:
+            debut = fin = date.fromisoformat(request.GET['date'])
+        else:
+            debut = date.fromisoformat(request.GET['debut'])
+            fin = date.fromisoformat(request.GET['fin'])
+    except (KeyError, ValueError):
+        return JsonResponse({'erreur': "Paramètres attendus : date, ou debut et fin (AAAA-MM-JJ)."}, status=400)
+
+    if fin < debut or (fin - debut).days > 31:
+        return JsonResponse({'erreur': "La période doit couvrir entre 1 et 32 jours."}, status=400)
+
+    tables = occupation.lister_tables()
+    grilles = occupation.grilles(debut, fin)
+
+    return JsonResponse({
+        'creneaux': [creneau.strftime('%H:%M') for creneau in occupation.CRENEAUX],
+        'tables': {table_id: {'number': number, 'seats': seats} for table_id, number, seats in tables},
+        'disponibilites': {
+            jour.isoformat(): occupation.tables_libres(grille, tables)
+            for jour, grille in sorted(grilles.items())
+        },
+    })
+
 @login_required(login_url='login')
 def mes_reservations(request):
-    user_reservations = Reservation.objects.filter(user=request.user).order_by('-date', '-time')
+    user_reservations = Reservation.objects.filter(user=request.user).select_related('table').order_by('-date', '-time')
     return render(request, 'restaurant/mes_reservations.html', {'reservations': user_reservations})
 
 @login_required
@@ -152,57 +200,44 @@ def annuler_reservation(request, reservation_id):
 
 @login_required(login_url='login')
 def commander(request):
-    entrees = Plat.objects.filter(categorie__type='entree', disponible=True)
-    plats = Plat.objects.filter(categorie__type='plat', disponible=True)
-    desserts = Plat.objects.filter(categorie__type='dessert', disponible=True)
+    carte = catalogue.plats_disponibles()
+    entrees = carte['entree']
+    plats = carte['plat']
+    desserts = carte['dessert']
 
     if request.method == 'POST':
-        montant_total = Decimal('0.00')
-        lignes_commande = []
-
-        for plat in list(entrees) + list(plats) + list(desserts):
-            qty = int(request.POST.get(f'quantite_{plat.id}', 0))
-            if qty > 0:
-                sous_total = plat.prix * qty
-                montant_total += sous_total
-                lignes_commande.append((plat, qty, plat.prix))
-
-        if montant_total > 0:
-            points_gagnes = int(montant_total // 5)
-            commande = Commande.objects.create(
-                user=request.user,
-                montant_total=montant_total,
-                mode_paiement=request.POST.get('mode_paiement', 'carte'),
-                adresse_livraison=request.POST.get('adresse', ''),
-                telephone=request.POST.get('telephone', ''),
-                points_gagnes=points_gagnes
-            )
-
-            for plat, qty, prix in lignes_commande:
-                LigneCommande.objects.create(
-                    commande=commande,
-                    plat=plat,
-                    quantite=qty,
-                    prix_unitaire=prix
-                )
-
-            profile = request.user.profile
-            profile.points += points_gagnes
-            profile.save()
-
-            return render(request, 'restaurant/commander.html', {
-                'entrees': entrees,
-                'plats': plats,
-                'desserts': desserts,
-                'commande': commande,
-                'points_gagnes': points_gagnes,
-                'points_total': profile.points,
+        try:
+            panier = normaliser_panier({
+                cle[len('quantite_'):]: valeur or 0
+                for cle, valeur in request.POST.items()
+                if cle.startswith('quantite_')
             })
+            if panier:
+                commande = passer_commande(
+                    request.user,
+                    panier,
+                    mode_paiement=request.POST.get('mode_paiement', 'carte'),
+                    adresse_livraison=request.POST.get('adresse', ''),
+                    telephone=request.POST.get('telephone', ''),
+                )
+                return render(request, 'restaurant/commander.html', {
+                    'entrees': entrees,
+                    'plats': plats,
+                    'desserts': desserts,
+                    'panier': panier_session.resume(request),
+                    'commande': commande,
+                    'points_gagnes': commande.points_gagnes,
+                    # Les points sont crédités par le worker : solde une fois crédités
+                    'points_total': request.user.profile.points + commande.points_gagnes,
+                })
+        except PanierInvalide as e:
+            messages.error(request, str(e))
 
     return render(request, 'restaurant/commander.html', {
         'entrees': entrees,
         'plats': plats,
         'desserts': desserts,
+        'panier': panier_session.resume(request),
     })
 
 @login_required(login_url='login')
@@ -211,46 +246,51 @@ def panier(request):
         form = CommandeForm(request.POST)
         panier_data = request.POST.get('panier_data')
 
-        if form.is_valid() and panier_data:
+        if form.is_valid():
             try:
-                panier = json.loads(panier_data)
-                montant_total = Decimal('0.00')
-                lignes = []
-
-                for item in panier:
-                    plat = Plat.objects.get(id=item['id'])
-                    quantite = int(item['quantite'])
-                    sous_total = plat.prix * quantite
-                    montant_total += sous_total
-                    lignes.append({
-                        'plat': plat,
-                        'quantite': quantite,
-                        'prix_unitaire': plat.prix
-                    })
-
-                commande = form.save(commit=False)
-                commande.user = request.user
-                commande.montant_total = montant_total
-                commande.save()
-
-                for ligne in lignes:
-                    LigneCommande.objects.create(
-                        commande=commande,
-                        plat=ligne['plat'],
-                        quantite=ligne['quantite'],
-                        prix_unitaire=ligne['prix_unitaire']
-                    )
-
-                messages.success(request, f"Commande #{commande.id} validée ! Montant total : {montant_total}€")
+                if panier_data:
+                    # Panier complet envoyé avec le formulaire
+                    commande = passer_commande(request.user, json.loads(panier_data), **form.cleaned_data)
+                else:
+                    commande = panier_session.commander(request, **form.cleaned_data)
+                messages.success(request, f"Commande #{commande.id} validée ! Montant total : {commande.montant_total}€")
                 return redirect('mes_commandes')
-            except Exception as e:
+            except (json.JSONDecodeError, PanierInvalide) as e:
                 messages.error(request, f"Erreur lors de la commande : {str(e)}")
     else:
         form = CommandeForm()
 
-    return render(request, 'restaurant/panier.html', {'form': form})
+    return render(request, 'restaurant/panier.html', {'form': form, 'panier': panier_session.resume(request)})
+
+def _modifier_panier(request, operation, *args):
+    if request.method != 'POST':
+        return JsonResponse({'erreur': "Méthode POST attendue."}, status=405)
+    try:
+        return JsonResponse(operation(request, *args))
+    except PanierInvalide as e:
+        return JsonResponse({'erreur': str(e)}, status=400)
+
+@login_required(login_url='login')
+def panier_contenu(request):
+    """Panier de la session, avec les prix de l'instantané du menu"""
+    return JsonResponse(panier_session.resume(request))
 
 @login_required(login_url='login')
+def panier_ajouter(request):
+    return _modifier_panier(request, panier_session.ajouter, request.POST.get('plat_id'), request.POST.get('quantite', 1))
+
+@login_required(login_url='login')
+def panier_modifier(request):
+    return _modifier_panier(request, panier_session.modifier, request.POST.get('plat_id'), request.POST.get('quantite'))
+
+@login_required(login_url='login')
+def panier_retirer(request):
+    return _modifier_panier(request, panier_session.retirer, request.POST.get('plat_id'))
+
+@login_required(login_url='login')
+# Avant condition() : l'ETag est lu sur la même base que la page
+@lecture_replica
+@condition(etag_func=etag_commandes)
 def mes_commandes(request):
     commandes = Commande.objects.filter(user=request.user).prefetch_related('lignes__plat')
     return render(request, 'restaurant/mes_commandes.html', {'commandes': commandes})
@@ -270,45 +310,21 @@ def valider_commande(request):
         messages.error(request, "Votre panier est vide.")
         return redirect('commander')
 
-    # Calcul du total
-    total = Decimal('0.00')
-    for item in panier:
-        plat = Plat.objects.get(id=item['id'])
-        total += plat.prix * int(item['quantite'])
-
-    # Création de la commande
-    commande = Commande.objects.create(
-        user=request.user,
-        montant_total=total,
-        mode_paiement='carte',
-        telephone='',
-        adresse_livraison='',
-    )
-
-    # Création des lignes de commande
-    for item in panier:
-        plat = Plat.objects.get(id=item['id'])
-        LigneCommande.objects.create(
-            commande=commande,
-            plat=plat,
-            quantite=int(item['quantite']),
-            prix_unitaire=plat.prix
-        )
-
-    # Calcul des points fidélité
-    profile = request.user.profile
-    points_gagnes = int(total // 5)
-    profile.points += points_gagnes
-    profile.save()
+    try:
+        commande = passer_commande(request.user, panier)
+    except PanierInvalide as e:
+        messages.error(request, str(e))
+        return redirect('commander')
 
     # On peut renvoyer un contexte pour afficher les points gagnés
     context = {
         'commande': commande,
-        'points_gagnes': points_gagnes,
-        'points_total': profile.points
+        'points_gagnes': commande.points_gagnes,
+        'points_total': request.user.profile.points + commande.points_gagnes,
+        'panier': panier_session.resume(request),
     }
 
-    messages.success(request, f"Commande validée ! Vous avez gagné {points_gagnes} points.")
+    messages.success(request, f"Commande validée ! Vous avez gagné {commande.points_gagnes} points.")
 
     # Rediriger ou afficher la confirmation
     return render(request, 'restaurant/commander.html', context)
@@ -317,8 +333,32 @@ def valider_commande(request):
 # AVIS
 # ============================================
 
+AVIS_PAR_PAGE = 20
+
+def requete_avis(request):
+    """Avis de la page demandée, plus un pour savoir s'il existe une page suivante."""
+    # Pagination par curseur sur (date_creation, id) : ?avant=<curseur du dernier avis vu>
+    avis_qs = Avis.objects.select_related('user').order_by('-date_creation', '-id')
+    try:
+        avis_qs = avis_qs.filter(avant('date_creation', decoder_curseur(request.GET['avant'])))
+    except (KeyError, ValueError):
+        pass
+    return avis_qs[:AVIS_PAR_PAGE + 1]
+
+def decouper_page(avis_list):
+    """(avis de la page, curseur de la page suivante ou None)"""
+    if len(avis_list) > AVIS_PAR_PAGE:
+        avis_list = avis_list[:AVIS_PAR_PAGE]
+        return avis_list, encoder_curseur(avis_list[-1].date_creation, avis_list[-1].pk)
+    return avis_list, None
+
+# Pas de @lecture_replica : la version des avis (ETag, clé du cache) est lue
+# sur la base principale, une réplique en retard servirait l'ancienne page
+# sous la nouvelle version
+@condition(etag_func=etag_avis)
+@cache_anonyme(dependances=('avis',))
 def avis(request):
-    avis_list = Avis.objects.all().select_related('user').order_by('-date_creation')
+    avis_list, curseur_suivant = decouper_page(list(requete_avis(request)))
 
     if request.user.is_authenticated:
         if request.method == 'POST':
@@ -338,6 +378,9 @@ def avis(request):
 
     return render(request, 'restaurant/avis.html', {
         'avis_list': avis_list,
+        'curseur_suivant': curseur_suivant,
+        'page_suivante': 'avant' in request.GET,
+        'stats': StatistiquesAvis.obtenir(),
         'form': form
     })
 
@@ -357,36 +400,17 @@ def paiement(request):
         if not panier:
             return redirect('commander')
 
-        total = Decimal('0.00')
-        for item in panier:
-            total += Decimal(str(item.get('prix', 0))) * item.get('quantite', 0)
-
-        points_gagnes = int(total)
-        profile = request.user.profile
-        profile.points += points_gagnes
-        profile.save()
-
-        commande = Commande.objects.create(
-            user=request.user,
-            montant_total=total,
-            mode_paiement='carte',
-            telephone='',
-            adresse_livraison=''
-        )
-
-        for item in panier:
-            plat = Plat.objects.get(id=item['id'])
-            LigneCommande.objects.create(
-                commande=commande,
-                plat=plat,
-                quantite=item['quantite'],
-                prix_unitaire=Decimal(str(item['prix']))
-            )
+        # Les prix envoyés par le client sont ignorés : le service les relit en base
+        try:
+            commande = passer_commande(request.user, panier)
+        except PanierInvalide as e:
+            messages.error(request, str(e))
+            return redirect('commander')
 
         return render(request, 'restaurant/paiement.html', {
             'commande': commande,
-            'points_gagnes': points_gagnes,
-            'points_total': profile.points
+            'points_gagnes': commande.points_gagnes,
+            'points_total': request.user.profile.points + commande.points_gagnes
         })
     else:
         return redirect('commander')
@@ -395,20 +419,27 @@ def paiement(request):
 # COMPTE UTILISATEUR
 # ============================================
 
-@login_required
+@client_required
 def mon_compte(request):
+    """
+    Page de compte pour les CLIENTS uniquement
+    """
     user = request.user
     
-    # Récupérer toutes les commandes de l'utilisateur
-    commandes = Commande.objects.filter(user=user).order_by('-date_creation')
+    # Les compteurs viennent de StatistiquesClient : rien n'est compté ici
+    statistiques = StatistiquesClient.obtenir(user)
+    
+    # Dernières commandes, avec leurs lignes et plats en une requête de plus
+    commandes = Commande.objects.filter(user=user).prefetch_related('lignes__plat').order_by('-date_creation')[:HISTORIQUE_MAX]
     
-    # Récupérer toutes les réservations de l'utilisateur
-    reservations = Reservation.objects.filter(user=user).order_by('-date')
+    # Dernières réservations
+    reservations = Reservation.objects.filter(user=user).select_related('table').order_by('-date', '-time')[:HISTORIQUE_MAX]
     
-    # Récupérer tous les avis de l'utilisateur
-    avis_list = Avis.objects.filter(user=user).order_by('-date_creation')
+    # Derniers avis
+    avis_list = Avis.objects.filter(user=user).order_by('-date_creation')[:HISTORIQUE_MAX]
     
     context = {
+        'statistiques': statistiques,
         'commandes': commandes,
         'reservations': reservations,
         'avis_list': avis_list,
@@ -416,10 +447,11 @@ def mon_compte(request):
     
     return render(request, 'restaurant/mon_compte.html', context)
 
-@login_required
+
+@client_required
 def update_profile(request):
     """
-    Vue pour mettre à jour les informations du profil client
+    Vue pour mettre à jour les informations du profil CLIENT
     """
     if request.method == 'POST':
         user = request.user
@@ -430,7 +462,7 @@ def update_profile(request):
         user.email = request.POST.get('email', '')
         user.save()
         
-        # Mettre à jour le profil (si vous avez un modèle Profile)
+        # Mettre à jour le profil
         if hasattr(user, 'profile'):
             user.profile.phone = request.POST.get('phone', '')
             user.profile.save()
@@ -440,8 +472,6 @@ def update_profile(request):
     
     return redirect('mon_compte')
 
-
-
 # ============================================
 # COMPTE EMPLOYÉ
 # ============================================
@@ -473,9 +503,11 @@ def mon_compte_employe(request):
             })
     
     # ✅ RÉCUPÉRER LES COMMANDES À SERVIR
-    commandes_a_servir = Commande.objects.filter(
-        statut__in=['en_attente', 'en_preparation']
-    ).select_related('user').prefetch_related('lignes__plat').order_by('-date_creation')
+    commandes_a_servir = cuisine.a_servir()
+
+    # Curseur de départ du flux : la page ne recevra que les changements suivants
+    dernier = cuisine.dernier_curseur(cuisine.borne()).first()
+    curseur_commandes = cuisine.encoder_curseur(*dernier) if dernier else cuisine.encoder_curseur(cuisine.borne(), 0)
     
     context = {
         'employe_info': employe_info,
@@ -484,9 +516,81 @@ def mon_compte_employe(request):
         'anciennete_annees': employe_info.anciennete_annees,
         'anciennete_jours': employe_info.anciennete_jours,
         'commandes_a_servir': commandes_a_servir,  # ✅ Nouvelle ligne
+        'curseur_commandes': curseur_commandes,
     }
     
     return render(request, 'restaurant/mon_compte_employe.html', context)
+
+
+RAPPORT_JOURS_MAX = 366
+
+@employe_required
+def rapport_ventes(request):
+    """
+    Rapport des ventes d'une période (?debut=&fin=, 7 derniers jours par défaut).
+    Tout est lu dans les agrégats VentesJour / VentesHeure, jamais dans les commandes.
+    """
+    fin = date.today()
+    debut = fin - timedelta(days=6)
+    try:
+        if request.GET.get('debut'):
+            debut = date.fromisoformat(request.GET['debut'])
+        if request.GET.get('fin'):
+            fin = date.fromisoformat(request.GET['fin'])
+    except ValueError:
+        messages.error(request, "Les dates doivent être au format AAAA-MM-JJ.")
+        return redirect('rapport_ventes')
+    if debut > fin or (fin - debut).days >= RAPPORT_JOURS_MAX:
+        messages.error(request, f"La période doit être valide et durer au plus {RAPPORT_JOURS_MAX} jours.")
+        return redirect('rapport_ventes')
+
+    sommes = {
+        'chiffre_affaires': Sum('chiffre_affaires'),
+        'nb_commandes': Sum('nb_commandes'),
+        'quantite': Sum('quantite'),
+    }
+    periode = VentesJour.objects.filter(jour__range=(debut, fin))
+
+    jours = list(periode.filter(dimension='total').order_by('jour'))
+    totaux = periode.filter(dimension='total').aggregate(**sommes)
+
+    def classement(dimension):
+        return list(
+            periode.filter(dimension=dimension)
+            .values('objet_id').annotate(**sommes)
+            .order_by('-chiffre_affaires', 'objet_id')
+        )
+
+    plats = classement('plat')
+    categories = classement('categorie')
+    noms_plats = Plat.objects.in_bulk([ligne['objet_id'] for ligne in plats])
+    noms_categories = Categorie.objects.in_bulk([ligne['objet_id'] for ligne in categories])
+    for ligne in plats:
+        plat = noms_plats.get(ligne['objet_id'])
+        ligne['nom'] = plat.nom if plat else f"Plat supprimé #{ligne['objet_id']}"
+    for ligne in categories:
+        categorie = noms_categories.get(ligne['objet_id'])
+        ligne['nom'] = categorie.nom if categorie else f"Catégorie supprimée #{ligne['objet_id']}"
+
+    heures = list(
+        VentesHeure.objects.filter(jour__range=(debut, fin), dimension='total')
+        .values('heure').annotate(**sommes).order_by('heure')
+    )
+    maximum = max((ligne['chiffre_affaires'] for ligne in heures), default=0) or 1
+    for ligne in heures:
+        ligne['pourcentage'] = int(ligne['chiffre_affaires'] * 100 / maximum)
+
+    context = {
+        'debut': debut,
+        'fin': fin,
+        'jours': jours,
+        'totaux': totaux,
+        'plats': plats,
+        'categories': categories,
+        'heures': heures,
+    }
+    return render(request, 'restaurant/rapport_ventes.html', context)
+
 @employe_required
 def update_employe_info(request):
     """
@@ -517,63 +621,6 @@ def update_employe_info(request):
     return redirect('mon_compte_employe')
 
 
-# ============================================
-# MODIFICATION DES VUES EXISTANTES
-# ============================================
-
-# Remplacez vos anciennes vues par celles-ci avec les décorateurs
-
-@client_required
-def mon_compte(request):
-    """
-    Page de compte pour les CLIENTS uniquement
-    """
-    user = request.user
-    
-    # Récupérer toutes les commandes de l'utilisateur
-    commandes = Commande.objects.filter(user=user).order_by('-date_creation')
-    
-    # Récupérer toutes les réservations de l'utilisateur
-    reservations = Reservation.objects.filter(user=user).order_by('-date')
-    
-    # Récupérer tous les avis de l'utilisateur
-    avis_list = Avis.objects.filter(user=user).order_by('-date_creation')
-    
-    context = {
-        'commandes': commandes,
-        'reservations': reservations,
-        'avis_list': avis_list,
-    }
-    
-    return render(request, 'restaurant/mon_compte.html', context)
-
-
-@client_required
-def update_profile(request):
-    """
-    Vue pour mettre à jour les informations du profil CLIENT
-    """
-    if request.method == 'POST':
-        user = request.user
-        
-        # Mettre à jour les informations de base
-        user.first_name = request.POST.get('first_name', '')
-        user.last_name = request.POST.get('last_name', '')
-        user.email = request.POST.get('email', '')
-        user.save()
-        
-        # Mettre à jour le profil
-        if hasattr(user, 'profile'):
-            user.profile.phone = request.POST.get('phone', '')
-            user.profile.save()
-        
-        messages.success(request, 'Vos informations ont été mises à jour avec succès !')
-        return redirect('mon_compte')
-    
-    return redirect('mon_compte')
-
-
-
 @employe_required
 def changer_statut_commande(request, commande_id):
     """
@@ -594,4 +641,35 @@ def changer_statut_commande(request, commande_id):
         except Commande.DoesNotExist:
             messages.error(request, 'Commande introuvable')
     
-    return redirect('mon_compte_employe')
\ No newline at end of file
+    return redirect('mon_compte_employe')
+
+
+# ============================================
+# ADMINISTRATION
+# ============================================
+
+@staff_required
+def export_commandes(request):
+    """
+    Export CSV de l'historique des commandes (une ligne par plat commandé).
+    Filtres : ?debut=AAAA-MM-JJ, ?fin=AAAA-MM-JJ, ?statut=livree,annulee
+    Le fichier est envoyé au fil de la lecture, sans être construit en mémoire.
+    """
+    try:
+        debut, fin, statuts = exports.lire_filtres(
+            request.GET.get('debut'), request.GET.get('fin'), request.GET.get('statut')
+        )
+    except ValueError as erreur:
+        return HttpResponseBadRequest(str(erreur))
+
+    nom = 'commandes'
+    if debut or fin:
+        nom += f"_{debut or 'origine'}_{fin or date.today()}"
+    # Sous ASGI, un itérateur synchrone serait lu en entier avant l'envoi
+    flux = exports.aflux_csv if settings.SERVEUR_ASGI else exports.flux_csv
+    response = StreamingHttpResponse(
+        flux(exports.commandes(debut, fin, statuts)),
+        content_type='text/csv; charset=utf-8',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{nom}.csv"'
+    return response
@@ -0,0 +1,152 @@
+# restaurant/views_async.py
+"""
+Vues asynchrones, servies sans bloquer de worker quand le projet tourne
+sous ASGI (projetweb/asgi.py).
+
+Les pages en lecture seule ont ici une variante asynchrone du même nom que
+dans views.py, que urls.py branche à la place de l'originale sous ASGI
+(settings.SERVEUR_ASGI). Elles attendent la base avec l'ORM asynchrone
+(async for, afirst, aaggregate) et le cache avec aget/aset (validateurs
+ETag, cache des pages), et ne rendent le template qu'une fois tout chargé :
+le rendu ne doit plus rien lire en base. Les écritures restent dans
+views.py.
+"""
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import render
+
+from . import catalogue, cuisine, views
+from .decorators import client_required
+from .forms import AvisForm
+from .models import Avis, Commande, Reservation, StatistiquesAvis, StatistiquesClient
+from .pages import aetag_avis, aetag_commandes, aetag_menu, cache_anonyme, condition_asynchrone
+from .routers import lecture_replica
+
+ATTENTE_MAX = 25  # secondes
+INTERVALLE = 1  # secondes entre deux lectures de la base
+RELANCE_WSGI = 5  # secondes entre deux appels du flux hors ASGI
+
+# ============================================
+# PAGES PUBLIQUES
+# ============================================
+
+@condition_asynchrone(aetag_menu)
+@cache_anonyme(60 * 60, dependances=('menu',))
+@lecture_replica
+async def page_menu(request):
+    return render(request, "restaurant/menu.html", {'version_menu': await catalogue.aversion_menu()})
+
+# Sans @lecture_replica, comme views.avis
+@condition_asynchrone(aetag_avis)
+@cache_anonyme(dependances=('avis',))
+async def avis(request):
+    if request.method == 'POST':
+        # La publication d'un avis reste synchrone (validation, transaction, signaux)
+        return await sync_to_async(views.avis)(request)
+
+    avis_list, curseur_suivant = views.decouper_page([avis async for avis in views.requete_avis(request)])
+    return render(request, 'restaurant/avis.html', {
+        'avis_list': avis_list,
+        'curseur_suivant': curseur_suivant,
+        'page_suivante': 'avant' in request.GET,
+        'stats': await StatistiquesAvis.aobtenir(),
+        'form': AvisForm() if request.user.is_authenticated else None,
+    })
+
+# ============================================
+# ESPACE CLIENT
+# ============================================
+
+@login_required(login_url='login')
+async def mes_reservations(request):
+    reservations = Reservation.objects.filter(user=request.user).select_related('table').order_by('-date', '-time')
+    return render(request, 'restaurant/mes_reservations.html', {
+        'reservations': [reservation async for reservation in reservations],
+    })
+
+@login_required(login_url='login')
+@lecture_replica
+@condition_asynchrone(aetag_commandes)
+async def mes_commandes(request):
+    commandes = Commande.objects.filter(user=request.user).prefetch_related('lignes__plat')
+    return render(request, 'restaurant/mes_commandes.html', {
+        'commandes': [commande async for commande in commandes],
+    })
+
+@client_required
+async def mon_compte(request):
+    user = request.user
+    commandes = Commande.objects.filter(user=user).prefetch_related('lignes__plat').order_by('-date_creation')
+    reservations = Reservation.objects.filter(user=user).select_related('table').order_by('-date', '-time')
+    avis_list = Avis.objects.filter(user=user).order_by('-date_creation')
+
+    return render(request, 'restaurant/mon_compte.html', {
+        'statistiques': await StatistiquesClient.aobtenir(user),
+        'commandes': [commande async for commande in commandes[:views.HISTORIQUE_MAX]],
+        'reservations': [reservation async for reservation in reservations[:views.HISTORIQUE_MAX]],
+        'avis_list': [avis async for avis in avis_list[:views.HISTORIQUE_MAX]],
+    })
+
+# ============================================
+# ESPACE EMPLOYÉ
+# ============================================
+
+async def flux_commandes(request):
+    """
+    Flux long-poll des commandes pour l'écran cuisine.
+
+    Sans curseur : renvoie les commandes à servir et le curseur courant.
+    Avec ?curseur= : attend jusqu'à ?attente= secondes (25 max) qu'une commande
+    soit créée ou modifiée, puis renvoie uniquement celles-ci.
+
+    L'attente n'a lieu que sous ASGI. Sous WSGI (gunicorn et ses workers
+    synchrones), la vue asynchrone occupe un worker entier pendant qu'elle
+    attend : elle répond donc tout de suite, et 'relance' indique au client
+    combien de secondes patienter avant l'appel suivant.
+    """
+    # request.user et request.role sont déjà résolus par ProfileMiddleware
+    if not request.user.is_authenticated:
+        return JsonResponse({'erreur': "Vous devez être connecté."}, status=401)
+    if request.role != 'employe':
+        return JsonResponse({'erreur': "Ce flux est réservé aux employés."}, status=403)
+
+    if 'curseur' not in request.GET:
+        limite = cuisine.borne()
+        commandes = [commande async for commande in cuisine.a_servir()]
+        dernier = await cuisine.dernier_curseur(limite).afirst()
+        return JsonResponse({
+            'curseur': cuisine.encoder_curseur(*dernier) if dernier else cuisine.encoder_curseur(limite, 0),
+            'commandes': [cuisine.serialiser(commande) for commande in commandes],
+            'complet': True,
+        })
+
+    try:
+        curseur = cuisine.decoder_curseur(request.GET['curseur'])
+        attente = min(max(int(request.GET.get('attente', ATTENTE_MAX)), 0), ATTENTE_MAX)
+    except ValueError:
+        return JsonResponse({'erreur': "Paramètres invalides."}, status=400)
+    if not settings.SERVEUR_ASGI:
+        attente = 0
+
+    fin = time.monotonic() + attente
+    while True:
+        commandes = [commande async for commande in cuisine.changements(curseur, cuisine.borne())]
+        if commandes or time.monotonic() >= fin:
+            break
+        await asyncio.sleep(INTERVALLE)
+
+    if commandes:
+        curseur = (commandes[-1].date_modification, commandes[-1].pk)
+
+    return JsonResponse({
+        'curseur': cuisine.encoder_curseur(*curseur),
+        'commandes': [cuisine.serialiser(commande) for commande in commandes],
+        # Faux si la limite a tronqué la réponse : le client relance aussitôt
+        'complet': len(commandes) < cuisine.LIMITE,
+        'relance': 0 if settings.SERVEUR_ASGI else RELANCE_WSGI,
+    })